@@ -4,111 +4,447 @@ from heuristics import init_heuristic
 from restart import init_restart_policy
 from bandit import init_bandit
 from ai import AssignInfo
+from arena import ClauseArena, SIZE, FLAGS, LEARNT, IMPORTED
 from preprocess import init_preprocess_policy
+from preprocess.equivalence import find_equivalences, substitute, reconstruct_equivalences
+from reduce import init_reduce_policy
+from tools.budget import Budget
+from tools.stats import SolverStats
+
+UNKNOWN = "UNKNOWN"  # the solution of a solve stopped by its budget
 
 
 class CDCL:
     """The conflict driven clause learning algorithm(`CDCL`) for `SAT` solver."""
 
-    def __init__(self, sentence, num_vars, assignment_algorithm, alpha, discount, batch, rp=None, bandit=None, pp=None):
-        """To simplify the use of data structures, `sentence` is a list of lists where each list
-        is a clause. Each clause is a list of literals, where a literal is a signed integer.
-        `assignment` is also a list of literals in the order of their assignment.
+    def __init__(self, sentence, num_vars, assignment_algorithm, alpha, discount, batch, rp=None, bandit=None, pp=None,
+                 dbp=None, reduce_schedule=(2000, 300), keep_tiers=(2, 6), reuse_trail=False, phase='save',
+                 preprocessor=None, probe=False, frozen=(), exchange=None, progress_interval=0,
+                 proof=None, bandit_reward="decisions"):
+        """`sentence` is a list of clauses, each one a list of literals, where a literal is a signed integer.
+        The (preprocessed) clauses are copied to a `ClauseArena` kept in `self.sentence`, where every clause is
+        referenced by its offset; a sentence that is not preprocessed may be given as a `ClauseArena` already (e.g.
+        `ClauseArena.from_flat(...)` of a file read by `tools.utils.read_cnf_flat`), which is used as is. Learned
+        clauses are appended to it behind the `num_original` clauses of the input, and `dbp` decides which of them are
+        deleted from time to time.
+        With `reuse_trail`, a restart keeps the decision levels that the heuristic would make again anyway.
+        The heuristic decides the variable to branch on, and `phase` ('save', 'target' or 'best') its polarity.
+        A `bandit` switches between the heuristics at restarts, rewarding them by `bandit_reward` (see `bandit.UCB`).
+        A `preprocessor` that has already run (e.g. restored from the formula cache) is used instead of `pp`.
+        With `probe`, equivalent literals are substituted and failed literals are probed before the first search.
+        The solver is incremental: clauses can be added by add_clause(...) between calls of solve(...). Neither
+        preprocessing nor probing eliminates the `frozen` variables, so every variable of a later clause or assumption
+        must be frozen, unless it is new. Probing freezes the variables of the clauses added before the first solve
+        and of its assumptions.
+        With a `tools.sharing.ClauseExchange`, short learned clauses are exported to other workers solving the same
+        sentence, and theirs are imported at restarts.
+        The counters of the search are kept in `stats`, which prints a progress line every `progress_interval` seconds
+        if it is not 0.
+        With a `tools.proof.DratProof`, the clauses added and deleted by preprocessing, probing, learning and database
+        reductions are logged, ending with the empty clause when the sentence is found unsatisfiable, so that the
+        proof can be checked against the input sentence. Clauses given to add_clause(...) are not logged and clauses
+        imported from other workers cannot be derived, so an UNSAT answer that depends on them is not proven.
         """
         # Initialize data structures.
-        self.preprocessor = init_preprocess_policy(pp, sentence, num_vars)
+        self.frozen = set(frozen)
+        self.proof = proof
+        self.preprocessor = preprocessor if preprocessor is not None else \
+            init_preprocess_policy(pp, sentence, num_vars, self.frozen, proof)
         self.sentence = self.preprocessor.preprocess() if self.preprocessor is not None else sentence
         self.num_vars = num_vars
-        self.c2l_watch, self.l2c_watch = self._init_watch()
-        self.ai = AssignInfo()  # assignment information
-        self.bandit = init_bandit(self.sentence, alpha, discount, batch, bandit)
+        self.dbp = init_reduce_policy(dbp, reduce_schedule, keep_tiers)  # learned clause database policy
+        self.reuse_trail = reuse_trail
+        self.num_restarts, self.time_for_restart = 0, 0
+        self.time_for_analysis = 0
+        self.probe, self.time_for_probe = probe, 0
+        self.equivalences = {}  # substituted variable -> its equivalent literal
+        self.num_failed_literals, self.num_probe_units = 0, 0
+        self.num_solves = 0
+        self.assumptions = []  # literals decided before any other one, at levels 1, 2, ...
+        self.core = []  # the failed assumptions of the last solve without a solution
+        self.pending = []  # clauses added since the last solve
+        self.unsat = False  # refuted without assumptions, whatever clauses are added later
+        self.budget = None  # the budget of the current (or last) solve, None for no limit
+        self.resumable = False  # stopped by the budget, the next solve goes on from there
+        self.exchange = exchange
+        self.stats = SolverStats(progress_interval)
+        if self.sentence is None:  # preprocessing has already refuted the sentence, nothing left to build
+            if proof is not None:
+                proof.add([])
+            return
+        self.eliminated = {var for var, _ in self.preprocessor.removed_clause} if self.preprocessor is not None \
+            else set()  # variables that must not appear in later clauses
+        if not isinstance(self.sentence, ClauseArena):
+            self.sentence = ClauseArena(self.sentence)
+        self.num_original = len(self.sentence)
+        self.last_learned = None  # reference of the last learned clause
+        self.watches, self.units = self._init_watch()
+        self.ai = AssignInfo(num_vars, phase)  # assignment information
+        self.ai.init_phase(self.sentence)
+        self.bandit = init_bandit(self.sentence, alpha, discount, batch, bandit, bandit_reward)
         self.assignment_algorithm = assignment_algorithm
         self.rp = init_restart_policy(rp)  # restart policy
         self.heuristic = init_heuristic(assignment_algorithm, self.sentence, alpha, discount, batch) \
             if self.bandit is None else self.bandit.Heuristics[0]  # heuristic algorithm
 
-    def solve(self):
-        """Solve the CNF sentence, which is the only interface for users."""
+    def solve(self, assumptions=None, conflicts=None, propagations=None, seconds=None, memory=None, interrupt=None):
+        """Solve the CNF sentence under the `assumptions`, a list of literals, which is the main interface for users.
+        It can be called again after add_clause(...): learned clauses, heuristic weights and watches are kept.
+        When there is no solution, `core` holds the failed assumptions, a subset of `assumptions` that cannot all be
+        true; it is empty if the sentence is unsatisfiable by itself.
+        The search stops with the solution UNKNOWN when one of the budgets of this call runs out (see
+        tools.budget.Budget): `conflicts`, `propagations`, `seconds`, `memory` (resident megabytes) or when the
+        `interrupt` flag is set; `budget.reason` tells which. The next solve with the same assumptions and no added
+        clause goes on from the trail where it stopped.
+        Return `(solution, preprocess_time, solve_time, stats)`, the stats count all the solves so far."""
         preprocess_time = self.preprocessor.time_for_preprocess if self.preprocessor is not None else 0
-        if self.sentence is None:
-            return None, preprocess_time, 0
+        self.core = []
+        if self.sentence is None or self.unsat:
+            return None, preprocess_time, 0, self.stats
         solve_time = time()
-        solution = self._calculate()
-        while solution == 'restart':  # only when specified restart policy, may solution be 'restart'
-            solution = self._restart()
+        self.stats.start()
+        limited = any(budget is not None for budget in (conflicts, propagations, seconds, memory, interrupt))
+        self.budget = Budget(self.stats, conflicts, propagations, seconds, memory, interrupt) if limited else None
+        assumptions = list(assumptions or ())
+        resume = self.resumable and not self.pending and assumptions == self.assumptions
+        self.resumable = False
+        self.assumptions = assumptions
+        if not resume and not self._start_over():  # an added clause is false at level 0
+            solution = None
+        elif self.probe and self.num_solves == 0 and not self._probe():
+            solution = None
+        else:
+            solution = self._calculate()
+            while solution == 'restart':  # only when specified restart policy, may solution be 'restart'
+                solution = self._restart()
+        self.num_solves += 1
+        self.unsat = solution is None and not self.core
+        if self.unsat and self.proof is not None:
+            self.proof.add([])
+        self.stats.stop()
         solve_time = time() - solve_time
+        if solution is UNKNOWN:
+            self.resumable = True
+            return solution, preprocess_time, solve_time, self.stats
+        if solution is not None:
+            solution = list(solution)  # the trail is changed by later solves
+        solution = reconstruct_equivalences(solution, self.equivalences)
         solution = solution if self.preprocessor is None else self.preprocessor.after_assignment(solution)
-        return solution, preprocess_time, solve_time
+        return solution, preprocess_time, solve_time, self.stats
+
+    def _start_over(self):
+        """Prepare a new search: backtrack to level 0 and take the new variables and clauses into account.
+        Return False if an added clause is false at level 0."""
+        if self.probe and self.num_solves == 0:  # the variables given so far may be given again later
+            self.frozen.update(abs(lit) for lit in self.assumptions)
+            self.frozen.update(abs(lit) for clause in self.pending for lit in clause)
+        self._add_variables(self.assumptions)
+        if self.ai.decided_idxs:
+            self._backtrack(0)
+        if len(self.watches) < 2 * self.num_vars + 1:  # new variables in the added clauses or the assumptions
+            self._grow_watches()
+        return self._add_pending_clauses()
+
+    def add_clause(self, clause):
+        """Add a clause to the sentence, it takes part in the next solves. Its variables must be new or frozen."""
+        if self.sentence is None:  # refuted by preprocessing, it stays so
+            return
+        clause = list(dict.fromkeys(clause))
+        self._add_variables(clause)  # a tautology is dropped, but its new variables are in the models all the same
+        if any(-lit in clause for lit in clause):
+            return
+        self.pending.append(clause)
+
+    def _add_variables(self, literals):
+        """Make room for the new variables of literals given between two solves, and check that none of the
+        variables has been eliminated."""
+        for lit in literals:
+            var = abs(lit)
+            if var in self.eliminated:
+                raise ValueError(f"Variable {var} has been eliminated, it should have been frozen")
+            if var > self.num_vars:
+                self.ai.grow(var)
+                self.num_vars = var
+            if not self.heuristic.has_variable(var):
+                for heuristic in self.bandit.Heuristics if self.bandit is not None else [self.heuristic]:
+                    if heuristic is not None:  # an arm built later is seeded with the variables of the others
+                        heuristic.add_variable(var)
+
+    def _add_pending_clauses(self):
+        """Add the clauses added since the last solve to the original clauses and attach them at level 0, whose
+        trail is kept with the watches of the other clauses and the saved phases. A clause watches its first two
+        literals once its false ones are moved to the back; with a single literal that is not false, it is a unit
+        assigned at level 0 (propagated by the next BCP), and with none, it is a conflict. While nothing has been
+        propagated, the units are left to the first BCP, which assigns all of them: probing may rebuild the arena of
+        the first solve before, and the trail must not reference its old clauses.
+        Return False if an added clause is false at level 0."""
+        pending, self.pending = self.pending, []
+        sentence, watches, value = self.sentence, self.watches, self.ai.value
+        propagated = self.ai.prop_head > 0
+        consistent = True
+        for clause in pending:
+            clause.sort(key=lambda lit: value[abs(lit)] == -lit)  # the false literals last
+            cref = sentence.add(clause)
+            self.num_original += 1
+            if len(clause) > 1:
+                watches[clause[0]].append(cref)
+                watches[clause[1]].append(cref)
+            else:
+                self.units.append(cref)
+            if not clause or value[abs(clause[0])] == -clause[0]:
+                consistent = False
+            elif propagated and (len(clause) == 1 or value[abs(clause[1])] == -clause[1]) and \
+                    not value[abs(clause[0])]:
+                self._handle_assign(clause[0], cref)
+        return consistent
+
+    def _grow_watches(self):
+        """Move the watches to a list large enough for the new variables, negative literals wrap around to its end."""
+        old, n = self.watches, len(self.watches) // 2
+        self.watches = [[] for _ in range(2 * self.num_vars + 1)]
+        for var in range(1, n + 1):
+            self.watches[var], self.watches[-var] = old[var], old[-var]
+
+    def _probe(self, budget=2000000):
+        """Simplify the sentence at level 0 before the search, return False if it is found unsatisfiable.
+        First every literal equivalent to another one (in a strongly connected component of the binary implication
+        graph) is substituted by it. Then each variable of a binary clause is assigned both ways at level 1 with the
+        propagation of the search: if one polarity conflicts, the other one is a unit (failed literal), and the literals
+        implied by both polarities are units as well. Probing stops after `budget` propagated literals."""
+        probe_time = time()
+        equivalences = find_equivalences(self.sentence, self.num_vars, self.frozen)
+        if equivalences is None:  # a literal is equivalent to its negation
+            if self.proof is None:
+                self.time_for_probe += time() - probe_time
+                return False
+            equivalences = {}  # both polarities of its variable fail below, which puts the units in the proof
+        if equivalences:
+            self.equivalences = equivalences
+            self.eliminated.update(equivalences)
+            clauses = list(self.sentence)  # there is no learned clause before the first search
+            substituted = substitute(clauses, equivalences)
+            if self.proof is not None:  # the substituted clauses follow by propagation over the equivalences
+                kept = {id(clause) for clause in substituted}
+                old = {id(clause) for clause in clauses}
+                for clause in substituted:
+                    if id(clause) not in old:
+                        self.proof.add(clause)
+                for clause in clauses:
+                    if id(clause) not in kept:
+                        self.proof.delete(clause)
+            self.sentence = ClauseArena(substituted)
+            self.num_original = len(self.sentence)
+            self.watches, self.units = self._init_watch()
+        ai = self.ai
+        consistent = self._bcp() is None
+        candidates = sorted({abs(lit) for clause in self.sentence if len(clause) == 2 for lit in clause})
+        covered = set()  # literals implied by a probed literal: if they failed, so would have the probed one
+        for var in candidates:
+            if not consistent or budget <= 0:
+                break
+            if ai.value[var]:
+                continue
+            implied = None
+            for lit in (var, -var):
+                if lit in covered:
+                    implied = set()
+                    continue
+                self._handle_assign(lit, None, True)
+                conflict_idx = self._bcp()
+                propagated = ai.assignments[ai.decided_idxs[0] + 1:]
+                budget -= len(propagated) + 1
+                self._backtrack(0)
+                if conflict_idx is not None:  # failed literal
+                    self.num_failed_literals += 1
+                    consistent = self._assign_unit(-lit)
+                    implied = None
+                    break
+                covered.update(propagated)
+                implied = set(propagated) if implied is None else implied.intersection(propagated)
+            for lit in implied or ():
+                if consistent and not ai.value[abs(lit)]:
+                    self.num_probe_units += 1
+                    if self.proof is not None:  # lit is implied by both polarities of var
+                        self.proof.add([var, lit])
+                        self.proof.add([-var, lit])
+                    consistent = self._assign_unit(lit)
+                    if self.proof is not None:
+                        self.proof.delete([var, lit])
+                        self.proof.delete([-var, lit])
+        self.time_for_probe += time() - probe_time
+        return consistent
+
+    def _assign_unit(self, lit):
+        """Add a unit clause found before the search to the original clauses, assign it at level 0 and propagate.
+        Return False if the propagation conflicts."""
+        idx = self.sentence.add([lit])
+        if self.proof is not None:
+            self.proof.add([lit])
+        self.units.append(idx)
+        self.num_original += 1
+        self._handle_assign(lit, idx)
+        return self._bcp() is None
 
     def _calculate(self):
         """The main calculation part for CDCL algorithm."""
-        conflict_ante = self._bcp()
-        if conflict_ante: return None  # indicate UNSAT
-        need_restart = self._after_bcp(conflict_ante)
+        conflict_idx = self._bcp()
+        if conflict_idx is not None: return None  # indicate UNSAT
+        need_restart = self._after_bcp(conflict_idx)
         if need_restart: return 'restart'
-        while len(self.ai.assigned) < self.num_vars:  # Main loop.
-            assigned_lit = self.heuristic.decide(self.ai.assigned)
-            self.ai.num_decisions += 1  # count the number of decisions
-            if not assigned_lit: return self.ai.assignments  # all assigned(found a solution), return solution
+        # Main loop, it goes on until all the variables and assumptions are assigned.
+        while len(self.ai.assignments) < self.num_vars or len(self.ai.decided_idxs) < len(self.assumptions):
+            if self.budget is not None and self.budget.exhausted(self.stats):
+                return UNKNOWN  # the trail is consistent and propagated, the search can go on from here
+            if self.dbp is not None and self.dbp.need_reduce():
+                self._reduce_db()
+            assigned_lit = self._next_assumption() if len(self.ai.decided_idxs) < len(self.assumptions) else 0
+            if assigned_lit is None: return None  # an assumption is false, the failed ones are in `core`
+            if not assigned_lit:
+                assigned_var = self.heuristic.decide(self.ai)
+                self.ai.num_decisions += 1  # count the number of decisions
+                self.stats.decisions += 1
+                if not assigned_var: return self.ai.assignments  # all assigned(found a solution), return solution
+                assigned_lit = self.ai.decide_phase(assigned_var)
             self._handle_assign(assigned_lit, None, True)
-            conflict_ante = self._bcp()
-            need_restart = self._after_bcp(conflict_ante)
+            conflict_idx = self._bcp()
+            need_restart = self._after_bcp(conflict_idx)
             if need_restart: return 'restart'
-            while conflict_ante:  # conflict occurs, learn conflict.
-                backtrack_level, learnt_clause, conflict_side_literals = self._analyze_conflict(conflict_ante)
+            while conflict_idx is not None:  # conflict occurs, learn conflict.
+                backtrack_level, learnt_clause, conflict_side_literals = self._analyze_conflict(conflict_idx)
                 if backtrack_level < 0: return None
-                self._after_conflict_analysis(learnt_clause, conflict_side_literals)
+                self._after_conflict_analysis(conflict_idx, learnt_clause, conflict_side_literals)
+                self.ai.update_target(self.ai.decided_idxs[-1])  # the levels below the conflict are consistent
                 self._backtrack(backtrack_level)
-                conflict_ante = self._bcp(True)
-                need_restart = self._after_bcp(conflict_ante)
+                conflict_idx = self._bcp(True)
+                need_restart = self._after_bcp(conflict_idx)
                 if need_restart: return 'restart'
         return self.ai.assignments  # indicate SAT
 
+    def _next_assumption(self):
+        """The next assumption to decide. An assumption that is already true gets an empty decision level, so that
+        level i + 1 always belongs to the i-th assumption. Return 0 once all the assumptions are true, or None if one
+        of them is false, after collecting the failed assumptions in `core`."""
+        ai = self.ai
+        while len(ai.decided_idxs) < len(self.assumptions):
+            lit = self.assumptions[len(ai.decided_idxs)]
+            if ai.is_true(lit):
+                ai.decided_idxs.append(len(ai.assignments))
+            elif ai.is_false(lit):
+                self.core = ai.analyse_final(self.sentence, lit)
+                return None
+            else:
+                return lit
+        return 0
+
     def _restart(self):
-        """Restart the solver"""
+        """Restart the solver by backtracking, the watches and the assignments of level 0 are kept.
+        A partial restart (reuse trail) keeps the decision levels whose decision variables the heuristic would still
+        pick before the best unassigned one."""
+        restart_time = time()
+        self.num_restarts += 1
+        self.stats.restarts += 1
+        self.ai.target_size = 0  # look for a new target in the next run
+        level = 0
         if self.bandit is not None:
-            self.heuristic = self.bandit.change_heuristic(self.ai)
-        self.ai.clear()
-        self.c2l_watch, self.l2c_watch = self._init_watch()
-        return self._calculate()
+            self.heuristic = self.bandit.change_heuristic(self.ai, self.stats)
+            self.heuristic.on_restart()
+        elif self.reuse_trail and not self.assumptions:
+            level = self.heuristic.reusable_level(self.ai)
+        if level < len(self.ai.decided_idxs):
+            self._backtrack(level)
+        self.ai.num_decisions = 0  # count the decisions of each run
+        consistent = self.exchange is None or level > 0 or self._import_clauses()
+        self.time_for_restart += time() - restart_time
+        return self._calculate() if consistent else None
+
+    def _import_clauses(self):
+        """Add the clauses learned by the other workers at level 0, through the path of learned clauses.
+        They are implied by the input sentence, which implies the (preprocessed) sentence of every worker. Clauses
+        with a variable unknown here, e.g. eliminated by preprocessing, are skipped, and so are the ones satisfied at
+        level 0; falsified literals are removed. Return False if an imported clause refutes the sentence."""
+        ai, heuristic = self.ai, self.heuristic
+        for clause, lbd in self.exchange.receive():
+            if any(not heuristic.has_variable(abs(lit)) or ai.is_true(lit) for lit in clause):
+                continue
+            clause = [lit for lit in clause if not ai.is_false(lit)]
+            if not clause:
+                return False
+            self.exchange.num_imported += 1
+            cref = self._add_learned_clause(clause, min(lbd, len(clause)), LEARNT | IMPORTED)
+            if len(clause) == 1:
+                self._handle_assign(clause[0], cref)
+                if self._bcp() is not None:
+                    return False
+        return True
 
     def _bcp(self, is_backtrack=False):
-        """Boolean constraint propagation with 2 watched literals per clause."""
-        i = len(self.ai.assigned) - 1
+        """Boolean constraint propagation with 2 watched literals per clause.
+        The watched literals of a clause are always kept at its positions 0 and 1, and `watches[lit]` holds the
+        reference of every clause watching `lit`. The literals are read and swapped in place in the memory of the
+        clause arena; the other watch of a clause is checked first, as reading it costs no more than a blocker literal
+        kept in the watch would.
+        Return the reference of the conflicting clause, or None if there is no conflict."""
+        ai, mem, watches = self.ai, self.sentence.mem, self.watches
+        value, assignments = ai.value, ai.assignments
         if is_backtrack:
-            i += 1
             self._handle_backtrack()
-        if not self.ai.assigned:  # first time to run bcp
-            i = 0
-            conflict_clause = self._handle_first_time_to_run()
-            if conflict_clause: return conflict_clause
-        while i < len(self.ai.assigned):  # iterate all new assignments
-            handle_lit = -self.ai.assignments[i]
-            watch_clauses, idx = self.l2c_watch.get(handle_lit, []), 0
-            while idx < len(watch_clauses):  # iterate all clause
-                clause_idx = watch_clauses[idx]
-                l0, l1 = self.c2l_watch[clause_idx]
-                satisfied = self._check_satisfied(l0, l1)
-                if satisfied:
-                    idx += 1
+        if not ai.prop_head:  # first time to run bcp, the units added since may be assigned already
+            conflict_idx = self._handle_first_time_to_run()
+            if conflict_idx is not None: return conflict_idx
+        head = ai.prop_head
+        while ai.prop_head < len(assignments):  # iterate all new assignments
+            false_lit = -assignments[ai.prop_head]
+            ai.prop_head += 1
+            watchers = watches[false_lit]
+            i, j, n = 0, 0, len(watchers)
+            while i < n:  # iterate all clauses watching the falsified literal, compacting the kept ones to the front
+                cref = watchers[i]
+                i += 1
+                first = mem[cref]
+                if first == false_lit:  # keep the falsified watch at position 1
+                    first = mem[cref] = mem[cref + 1]
+                    mem[cref + 1] = false_lit
+                if value[abs(first)] == first:  # satisfied by the other watch
+                    watchers[j] = cref
+                    j += 1
                     continue
-                propagated, is_unit_or_conflict = self._propagate_watch_on_clause(handle_lit, clause_idx)
-                if not propagated: idx += 1
-                if is_unit_or_conflict:
-                    conflict_clause = self._handle_unit_or_conflict(clause_idx, l0, l1, handle_lit)
-                    if conflict_clause: return conflict_clause
-            i += 1
-        return None  # indicate no conflict; other return the antecedent of the conflict
-
-    def _after_conflict_analysis(self, learnt_clause, conflict_side_literals):
+                k = cref + 2
+                for lit in mem[k:cref + mem[cref + SIZE]]:  # try to find a new literal to watch
+                    if value[abs(lit)] != -lit:
+                        mem[cref + 1], mem[k] = lit, false_lit
+                        watches[lit].append(cref)
+                        break
+                    k += 1
+                else:  # the clause is unit or conflicting, keep watching it
+                    watchers[j] = cref
+                    j += 1
+                    if value[abs(first)] == -first:  # conflicted clause
+                        del watchers[j:i]
+                        self.stats.after_bcp(ai.prop_head - head, len(assignments))
+                        return cref
+                    self._handle_assign(first, cref)
+            del watchers[j:]
+        self.stats.after_bcp(ai.prop_head - head, len(assignments))
+        return None  # indicate no conflict; other return the index of the conflict clause
+
+    def _after_conflict_analysis(self, conflict_idx, learnt_clause, conflict_side_literals):
         """After conflict analysis, maintain relevant data structure"""
-        self._add_learned_clause(learnt_clause)
+        lbd = self.ai.lbd(learnt_clause)
+        self.stats.after_learn(learnt_clause, lbd)
+        if self.dbp is not None:
+            self._bump_clauses(conflict_idx, conflict_side_literals)
+            self.dbp.after_conflict(self.sentence)
+        if self.exchange is not None:
+            self._count_useful(conflict_idx, conflict_side_literals)
+            self.exchange.export(learnt_clause, lbd)
+        self._add_learned_clause(learnt_clause, lbd)
         self.heuristic.after_conflict_analysis(learnt_clause, conflict_side_literals, self.sentence, self.ai)
         if self.rp:
             self.rp.after_conflict(learnt_clause, self.ai)
 
-    def _after_bcp(self, conflict_ante):
+    def _after_bcp(self, conflict_idx):
         """After bcp, maintain relevant data structure"""
+        conflict_ante = self.sentence[conflict_idx] if conflict_idx is not None else None
         self.heuristic.after_bcp(conflict_ante)
         if self.rp:
             return self.rp.after_bcp(conflict_ante)
@@ -117,81 +453,45 @@ class CDCL:
         """Assign a literal. maintain relevant data structure
         """
         if is_decide:
-            self.ai.decided_idxs.append(len(self.ai.assigned))
+            self.ai.decided_idxs.append(len(self.ai.assignments))
         self.ai.on_assign(lit, ante)
         self.heuristic.on_assign(lit)
 
     def _init_watch(self):
-        """Initialize the watched literal data structure."""
-        c2l_watch, l2c_watch = {}, {}  # c2l_watch: clause to literal watch, l2c_watch: literal to clause watch
-        for i in range(len(self.sentence)):
-            c2l_watch[i] = [self.sentence[i][0]]
-            l2c_watch[self.sentence[i][0]] = l2c_watch.get(self.sentence[i][0], []) + [i]
-            if len(self.sentence[i]) > 1:
-                c2l_watch[i].append(self.sentence[i][1])
-                l2c_watch[self.sentence[i][1]] = l2c_watch.get(self.sentence[i][1], []) + [i]
-        return c2l_watch, l2c_watch
-
-    def _propagate_watch_on_clause(self, lit, clause_idx):
-        """propagate watching literal on a clause(sentence[clause_idx]).
-        try to find a new literal to replace currently watching literal(lit)"""
-        propagated, is_unit_or_conflict = False, True
-        for literal in self.sentence[clause_idx]:  # o.s. checking for all literal in clause
-            # if having satisfied literal, check next clause
-            if literal in self.ai.assigned:
-                is_unit_or_conflict = False
-                break
-            # if having any literal whose negation unassigned, adjust watching literals for this clause,
-            # o.w., this clause is unit or conflict
-            if literal not in self.c2l_watch[clause_idx] and -literal not in self.ai.assigned:
-                self._change_watch_to(clause_idx, lit, literal)
-                is_unit_or_conflict = False
-                propagated = True
-                break
-        return propagated, is_unit_or_conflict
-
-    def _change_watch_to(self, clause_idx, old_lit, new_lit):
-        """change watching literal from old_lit to new_lit on clause(sentence[clause_idx])"""
-        self.c2l_watch[clause_idx].remove(old_lit)
-        self.l2c_watch[old_lit].remove(clause_idx)
-        self.c2l_watch[clause_idx].append(new_lit)
-        self.l2c_watch[new_lit] = self.l2c_watch.get(new_lit, []) + [clause_idx]
-
-    def _check_satisfied(self, l0, l1):
-        """check if clause already sat or already has two validate literals watching"""
-        satisfied = False
-        if any([l0 in self.ai.assigned, l1 in self.ai.assigned]) or all(
-                [-l0 not in self.ai.assigned, -l1 not in self.ai.assigned]):
-            satisfied = True
-        return satisfied
+        """Initialize the watched literal data structure.
+        `watches` is indexed by signed literal: a negative literal wraps around to the back half of the list.
+        Clauses with only 1 literal cannot be watched and are collected in `units` instead."""
+        watches, units, mem = [[] for _ in range(2 * self.num_vars + 1)], [], self.sentence.mem
+        for cref in self.sentence.crefs():
+            if mem[cref + SIZE] > 1:
+                watches[mem[cref]].append(cref)
+                watches[mem[cref + 1]].append(cref)
+            else:
+                units.append(cref)
+        return watches, units
 
     def _handle_backtrack(self):
         """when the bcp is rerun after a conflict backtracking, add the newly learned unit clause's literal
         to the assignment
         """
-        self._handle_assign(self.c2l_watch[len(self.sentence) - 1][0], len(self.sentence) - 1)
+        self._handle_assign(self.sentence.mem[self.last_learned], self.last_learned)
 
     def _handle_first_time_to_run(self):
         """handle run bcp for the first time, handle all clauses with only 1 literal"""
-        for clause_idx, literals in self.c2l_watch.items():
-            if len(literals) == 1:  # unit clause
-                if -literals[0] in self.ai.assigned:
-                    return list(self.sentence[clause_idx])
-                if literals[0] not in self.ai.assigned:
-                    self._handle_assign(literals[0], clause_idx)
-        return None
-
-    def _handle_unit_or_conflict(self, clause_idx, l0, l1, handle_lit):
-        """handle unit clause or conflict clause"""
-        another = l0 if l0 != handle_lit else l1
-        if -another in self.ai.assigned:  # conflicted clause
-            return list(self.sentence[clause_idx])
-        self._handle_assign(another, clause_idx)
+        for clause_idx in self.units:
+            clause = self.sentence[clause_idx]
+            if not clause or self.ai.is_false(clause[0]):
+                return clause_idx
+            if not self.ai.is_true(clause[0]):
+                self._handle_assign(clause[0], clause_idx)
         return None
 
-    def _analyze_conflict(self, conflict_ante):
+    def _analyze_conflict(self, conflict_idx):
         """analyze conflict clause and return the learned clause"""
-        return self.ai.analyse_conflict(self.sentence, conflict_ante)
+        analysis_time = time()
+        result = self.ai.analyse_conflict(self.sentence, self.sentence[conflict_idx])
+        self.time_for_analysis += time() - analysis_time
+        return result
 
     def _backtrack(self, level):
         """Backtrack by deleting assigned variables.
@@ -201,16 +501,70 @@ class CDCL:
             self.heuristic.on_unassign(lit)
         self.heuristic.update_weights(unassigned_lits)
 
-    def _add_learned_clause(self, learned_clause):
-        """Add learned clause to the sentence and update watch.
+    def _add_learned_clause(self, learned_clause, lbd, flags=LEARNT):
+        """Add learned clause to the sentence and update watch, return its reference.
         learned_clause is unit and in decreasing order of assignment. We choose to watch the first literal which
-        is the only one satisfiable. This can promise least check of this clause for later rerun `bcp(...)` """
-        i = len(self.sentence)
-        self.sentence.append(learned_clause)
-        lit = learned_clause[0]
-        self.c2l_watch[i] = [lit]
-        self.l2c_watch.update({lit: self.l2c_watch.get(lit, []) + [i]})
+        is the only one satisfiable and the second one which is the latest falsified, so that the watches stay valid
+        after backtracking."""
+        cref = self.last_learned = self.sentence.add(learned_clause, flags, lbd)
+        if self.proof is not None:
+            self.proof.add(learned_clause)
+        if self.dbp is not None:
+            self.dbp.after_learn(self.sentence, cref)
         if len(learned_clause) > 1:
-            lit = learned_clause[1]
-            self.c2l_watch[i].append(lit)
-            self.l2c_watch.update({lit: self.l2c_watch.get(lit, []) + [i]})
+            self.watches[learned_clause[0]].append(cref)
+            self.watches[learned_clause[1]].append(cref)
+        else:
+            self.units.append(cref)
+        return cref
+
+    def num_learned(self):
+        """Number of learned clauses currently kept in the sentence."""
+        return len(self.sentence) - self.num_original if self.sentence is not None else 0
+
+    def _bump_clauses(self, conflict_idx, conflict_side_literals):
+        """Bump the activity of the learned clauses used in the conflict analysis: the conflict clause and the
+        antecedents of the resolved literals."""
+        sentence, mem, antes = self.sentence, self.sentence.mem, self.ai.antes
+        if mem[conflict_idx + FLAGS] & LEARNT:
+            self.dbp.bump(sentence, conflict_idx)
+        for lit in conflict_side_literals:
+            ante = antes[abs(lit)]
+            if ante is not None and mem[ante + FLAGS] & LEARNT:
+                self.dbp.bump(sentence, ante)
+
+    def _count_useful(self, conflict_idx, conflict_side_literals):
+        """Count the imported clauses taking part in a conflict analysis for the first time."""
+        mem, antes = self.sentence.mem, self.ai.antes
+        for cref in [conflict_idx] + [antes[abs(lit)] for lit in conflict_side_literals]:
+            if mem[cref + FLAGS] & IMPORTED:
+                mem[cref + FLAGS] &= ~IMPORTED
+                self.exchange.num_useful += 1
+
+    def _reduce_db(self):
+        """Delete the learned clauses chosen by the database policy, with their watches. Antecedents of the current
+        assignments are never deleted. Once the deleted clauses waste enough of the arena, it is compacted and the
+        references held by the antecedents, watches and units are remapped."""
+        sentence, ai = self.sentence, self.ai
+        locked = set()
+        for lit in ai.assignments:
+            ante = ai.antes[abs(lit)]
+            if ante is not None and sentence.is_learnt(ante):
+                locked.add(ante)
+        deleted = self.dbp.reduce(sentence, locked)
+        if not deleted:
+            return
+        self.stats.deleted += len(deleted)
+        for cref in deleted:
+            if self.proof is not None:
+                self.proof.delete(sentence[cref])
+            sentence.delete(cref)
+        moved = sentence.compact() if sentence.need_compaction() else {}
+        if moved:
+            for lit in ai.assignments:
+                ante = ai.antes[abs(lit)]
+                if ante is not None:
+                    ai.antes[abs(lit)] = moved.get(ante, ante)
+            self.units = [moved.get(cref, cref) for cref in self.units]
+        for watchers in self.watches:
+            watchers[:] = [moved.get(cref, cref) for cref in watchers if cref not in deleted]
@@ -3,80 +3,215 @@
 
 class AssignInfo:
     """
-    A struct used for recording the assignment information
+    A struct used for recording the assignment information.
+    The trail is kept in `assignments`, while value, level and antecedent of every variable are stored in arrays
+    indexed by variable number, so that looking them up or undoing them costs O(1) per variable.
+    The polarity of a decision is chosen by `phase`:
+    'save' reuses the last value of the variable (phase saving),
+    'target' prefers the values of the largest conflict-free trail since the last restart,
+    'best' prefers the values of the largest conflict-free trail ever seen.
     """
-    def __init__(self):
-        self.assignments = []
-        self.antes = []
-        self.decided_idxs = []
-        self.assigned = set()
-        self.assigned_idxs = {}
+    def __init__(self, num_vars, phase='save'):
+        if phase not in ('save', 'target', 'best'):
+            raise ValueError(f"Unknown phase policy: {phase}")
+        self.num_vars = num_vars
+        self.phase = phase
+        self.assignments = []   # the trail: assigned literals in the order of their assignment
+        self.decided_idxs = []  # trail limits: index in the trail where each decision level starts
+        self.value = [0] * (num_vars + 1)  # variable -> the assigned literal (var or -var), 0 if unassigned
+        self.levels = [0] * (num_vars + 1)  # variable -> decision level of its assignment
+        self.antes = [None] * (num_vars + 1)  # variable -> index of its antecedent clause, None if decided
+        self.prop_head = 0  # index of the next literal in the trail to be propagated
         self.num_decisions = 0
+        self.seen = [0] * (num_vars + 1)  # variable -> 1 if marked during conflict analysis, always reset after
+        self.num_learned_literals, self.num_minimized_literals = 0, 0  # learned clause sizes before/after minimization
+        self.saved_phase = [-var for var in range(num_vars + 1)]  # variable -> literal it was last assigned to
+        self.target_phase = [0] * (num_vars + 1)  # variable -> literal in the target trail, 0 if not in it
+        self.best_phase = [0] * (num_vars + 1)
+        self.target_size, self.best_size = 0, 0
 
     def on_assign(self, lit, ante):
+        var = abs(lit)
+        self.value[var] = lit
+        self.levels[var] = len(self.decided_idxs)
+        self.antes[var] = ante
         self.assignments.append(lit)
-        self.antes.append(ante)
-        self.assigned_idxs.update({lit: len(self.assigned)})
-        self.assigned.add(lit)
+
+    def is_true(self, lit):
+        """whether the literal is assigned to be true"""
+        return self.value[abs(lit)] == lit
+
+    def is_false(self, lit):
+        """whether the literal is assigned to be false"""
+        return self.value[abs(lit)] == -lit
+
+    def is_assigned(self, lit):
+        """whether the variable of the literal is assigned"""
+        return self.value[abs(lit)] != 0
 
     def analyse_conflict(self, sentence, conflict_ante):
         """Analyze the conflict with first-UIP clause learning.
-        Resolve conflict clause with its last assigned literal's ante-clause until only one literal having the highest
-        level in conflict clause.
-        Learned clause returned should be in decreasing order of the assignment, which means the latest assigned literal
-        is in the head. This will facilitate the later call of add_learned_clause(...)"""
-        backtrack_level, learned_clause, conflict_side_literals = None, [], []
-        if self._conflict_clause_level_is_0(conflict_ante):
-            return -1, learned_clause, conflict_side_literals
-        # get the highest level's assignments
-        ass = dict([(self.assignments[i], self.antes[i]) for i in
-                    range(len(self.assigned) - 1, self.decided_idxs[-1] - 1, -1)])
-        conflict_ante = set(conflict_ante)  # use set to accelerate
-        highest_level_literals = [-literal for literal in ass if -literal in conflict_ante]
-        while len(highest_level_literals) > 1:
-            conflict_side_literals.append(highest_level_literals[0])
-            conflict_ante = self._resolve(conflict_ante, sentence[ass[-highest_level_literals[0]]])
-            highest_level_literals = [-literal for literal in ass if -literal in conflict_ante]
-        if len(highest_level_literals) == 1:
-            learned_clause = sorted(conflict_ante, key=lambda key: self.level(-key), reverse=True)
-            backtrack_level = 0 if len(learned_clause) == 1 else self.level(-learned_clause[1])
-        return backtrack_level, learned_clause, conflict_side_literals
+        Walk the trail backwards from the conflict, resolving the ante-clause of every marked literal of the highest
+        level, until only one literal of that level (the first UIP) is left. `seen` marks the variables already in the
+        clause, so that every resolution step costs only the length of the ante-clause.
+        The learned clause is then minimized, its head is the UIP and its second literal has the highest level of the
+        others, which will facilitate the later call of add_learned_clause(...)"""
+        if not self.decided_idxs:  # conflict at level 0
+            return -1, [], []
+        seen, levels, antes, assignments = self.seen, self.levels, self.antes, self.assignments
+        level = len(self.decided_idxs)
+        learned_clause, conflict_side_literals, marked = [0], [], []
+        count, idx, clause = 0, len(assignments) - 1, conflict_ante
+        while True:
+            for literal in clause:
+                var = abs(literal)
+                if not seen[var] and levels[var] > 0:
+                    seen[var] = 1
+                    marked.append(var)
+                    if levels[var] == level:
+                        count += 1  # resolved later, when the trail walk reaches it
+                    else:
+                        learned_clause.append(literal)
+            while not seen[abs(assignments[idx])]:
+                idx -= 1
+            uip = assignments[idx]
+            idx -= 1
+            count -= 1
+            if count == 0:
+                break
+            conflict_side_literals.append(-uip)
+            clause = sentence[antes[abs(uip)]]
+        learned_clause[0] = -uip
+        self.num_learned_literals += len(learned_clause)
+        self._minimize(sentence, learned_clause, marked)
+        self.num_minimized_literals += len(learned_clause)
+        for var in marked:
+            seen[var] = 0
+        if len(learned_clause) == 1:
+            return 0, learned_clause, conflict_side_literals
+        i = max(range(1, len(learned_clause)), key=lambda k: levels[abs(learned_clause[k])])
+        learned_clause[1], learned_clause[i] = learned_clause[i], learned_clause[1]
+        return levels[abs(learned_clause[1])], learned_clause, conflict_side_literals
+
+    def _minimize(self, sentence, learned_clause, marked):
+        """Recursive learned clause minimization: remove the literals implied by the other literals of the clause.
+        A literal is redundant if every literal of its ante-clause is in the clause or redundant itself. The search
+        gives up as soon as it reaches a decision or a level not in the clause, which is checked cheaply with a bit
+        mask of the levels of the clause (the level abstraction)."""
+        seen, levels, antes = self.seen, self.levels, self.antes
+        abstract_level = 0
+        for literal in learned_clause[1:]:
+            abstract_level |= 1 << (levels[abs(literal)] & 31)
+        j = 1
+        for i in range(1, len(learned_clause)):
+            literal = learned_clause[i]
+            if antes[abs(literal)] is None or not self._redundant(sentence, literal, abstract_level, marked):
+                learned_clause[j] = literal
+                j += 1
+        del learned_clause[j:]
+
+    def _redundant(self, sentence, literal, abstract_level, marked):
+        """whether a literal of the learned clause is implied by the others, see _minimize(...).
+        Literals found redundant on the way stay marked in `seen`; on failure the marks of this search are undone."""
+        seen, levels, antes = self.seen, self.levels, self.antes
+        stack, top = [abs(literal)], len(marked)
+        while stack:
+            pivot = stack.pop()
+            for lit in sentence[antes[pivot]]:
+                var = abs(lit)
+                if var == pivot or seen[var] or levels[var] == 0:
+                    continue
+                if antes[var] is not None and abstract_level & (1 << (levels[var] & 31)):
+                    seen[var] = 1
+                    marked.append(var)
+                    stack.append(var)
+                else:
+                    for v in marked[top:]:
+                        seen[v] = 0
+                    del marked[top:]
+                    return False
+        return True
+
+    def analyse_final(self, sentence, literal):
+        """Find the assumptions responsible for the assumption `literal` being false, when the decision levels are
+        all assumptions. Walk the trail backwards from the end, resolving the ante-clause of every marked literal;
+        the marked decisions reached on the way are the other failed assumptions."""
+        core, var = [literal], abs(literal)
+        if self.levels[var] == 0:
+            return core
+        seen, levels, antes, assignments = self.seen, self.levels, self.antes, self.assignments
+        seen[var] = 1
+        for idx in range(len(assignments) - 1, self.decided_idxs[0] - 1, -1):
+            lit = assignments[idx]
+            var = abs(lit)
+            if not seen[var]:
+                continue
+            if antes[var] is None:
+                core.append(lit)
+            else:
+                for other in sentence[antes[var]]:
+                    if levels[abs(other)] > 0:
+                        seen[abs(other)] = 1
+            seen[var] = 0
+        return core
 
     def backtrack(self, level):
         """backtrack to the level"""
         unassigned_literals = self.assignments[self.decided_idxs[level]:]
-        self.assignments = self.assignments[:self.decided_idxs[level]]
-        self.antes = self.antes[:self.decided_idxs[level]]
+        del self.assignments[self.decided_idxs[level]:]
+        value, saved_phase = self.value, self.saved_phase
         for literal in unassigned_literals:
-            self.assigned_idxs.pop(literal)
-            self.assigned.remove(literal)
-        self.decided_idxs = self.decided_idxs[:level]
+            value[abs(literal)] = 0
+            saved_phase[abs(literal)] = literal
+        del self.decided_idxs[level:]
+        self.prop_head = len(self.assignments)
         return unassigned_literals
 
-    def level(self, literal):
-        """compute level of an assigned literal"""
-        index = self.assigned_idxs[literal]
-        for i in range(len(self.decided_idxs)):
-            if index < self.decided_idxs[i]:
-                return i
-        return len(self.decided_idxs)
-
-    def clear(self):
-        self.assignments = []
-        self.antes = []
-        self.decided_idxs = []
-        self.assigned = set()
-        self.assigned_idxs = {}
-        self.num_decisions = 0
+    def init_phase(self, sentence):
+        """Initialize the saved phase of every variable to its more frequent polarity in the sentence."""
+        count = [0] * (self.num_vars + 1)
+        for clause in sentence:
+            for literal in clause:
+                count[abs(literal)] += 1 if literal > 0 else -1
+        self.saved_phase = [var if count[var] > 0 else -var for var in range(self.num_vars + 1)]
 
-    def _resolve(self, clause1, clause2):
-        """resolve two clause, one is conflict clause, another is unit clause, the result is conflict clause"""
-        clause1.update(clause2)
-        clause = set([l for l in clause1 if -l not in clause1])
-        return clause
+    def decide_phase(self, var):
+        """the literal of a decision variable, according to the phase policy"""
+        if self.phase == 'target':
+            return self.target_phase[var] or self.saved_phase[var]
+        if self.phase == 'best':
+            return self.best_phase[var] or self.saved_phase[var]
+        return self.saved_phase[var]
 
-    def _conflict_clause_level_is_0(self, clause):
-        """compute the level of a conflict clause --- the highest level of all literals' negations in clause"""
-        return all([self.level(-literal) == 0 for literal in clause])
+    def update_target(self, size):
+        """Called before backtracking with the size of the trail prefix known to be conflict-free.
+        Record it as the target (and best) phase if it is larger than the ones recorded."""
+        if self.phase == 'save' or size <= self.target_size:
+            return
+        target_phase = self.target_phase
+        for literal in self.assignments[:size]:
+            target_phase[abs(literal)] = literal
+        self.target_size = size
+        if size > self.best_size:
+            self.best_phase[:] = target_phase
+            self.best_size = size
+
+    def level(self, literal):
+        """decision level of an assigned literal"""
+        return self.levels[abs(literal)]
 
+    def lbd(self, clause):
+        """literal block distance of a clause: the number of distinct decision levels of its literals"""
+        levels = self.levels
+        return len({levels[abs(literal)] for literal in clause})
 
+    def grow(self, num_vars):
+        """Make room for the variables up to num_vars."""
+        extra = num_vars - self.num_vars
+        if extra <= 0:
+            return
+        for values in (self.value, self.levels, self.seen, self.target_phase, self.best_phase):
+            values.extend([0] * extra)
+        self.antes.extend([None] * extra)
+        self.saved_phase.extend(-var for var in range(self.num_vars + 1, num_vars + 1))
+        self.num_vars = num_vars
@@ -0,0 +1,149 @@
+"""
+arena.py
+the clause database of the solver: all clauses in one flat array of int32 words, each one referenced by an offset.
+"""
+from array import array
+from struct import Struct
+
+HEADER = 3  # words in front of the literals of every clause
+SIZE, FLAGS, ACTIVITY = -3, -2, -1  # positions of the header words relative to the reference of a clause
+LEARNT, DELETED, USED = 1, 2, 4  # flag bits, the LBD is stored above them
+IMPORTED = 8  # from another worker, cleared once the clause takes part in a conflict analysis
+LBD_SHIFT = 4
+
+_FLOAT, _INT = Struct("f"), Struct("i")
+
+
+def _bits(activity):
+    """The float32 activity as the int32 word with the same bits."""
+    return _INT.unpack(_FLOAT.pack(activity))[0]
+
+
+def _activity(bits):
+    return _FLOAT.unpack(_INT.pack(bits))[0]
+
+
+class ClauseArena:
+    """All the clauses in one `array('i')`, without a Python list or int per clause or literal.
+    A clause is referenced by the offset `cref` of its first literal in `mem`, and its literals are
+    `mem[cref:cref + size]`. The header in front of them holds its size, its flags (learnt, deleted, used since the
+    last reduction, imported from another worker) with its LBD above them, and its activity as the bits of a float32.
+    Deleted clauses stay in place until the wasted words exceed `garbage` of the arena, then compact() moves the live
+    clauses behind them to the front, and the references held elsewhere (reasons, watches) must be remapped.
+    Indexing the arena by a reference gives a copy of the literals of the clause, iterating it gives the live clauses."""
+
+    def __init__(self, clauses=(), garbage=0.2):
+        self.mem = array("i")
+        self.garbage = garbage
+        self.num_clauses = 0  # live clauses
+        self.wasted = 0  # words of deleted clauses
+        self.first_deleted = None  # reference of the first deleted clause, where compaction starts
+        mem = self.mem
+        for clause in clauses:
+            if len(set(clause)) != len(clause):  # a literal watched twice would break the invariant of the watches
+                clause = list(dict.fromkeys(clause))
+            mem.extend((len(clause), 0, 0))
+            mem.extend(clause)
+            self.num_clauses += 1
+
+    @classmethod
+    def from_flat(cls, literals, offsets, garbage=0.2):
+        """The arena of a flat sentence as returned by `tools.utils.read_cnf_flat`, the literals of clause k being
+        `literals[offsets[k]:offsets[k + 1]]`, without building a list per clause."""
+        arena = cls(garbage=garbage)
+        mem = arena.mem
+        for start, end in zip(offsets, offsets[1:]):
+            clause = literals[start:end]
+            if len(set(clause)) != end - start:
+                clause = array("i", dict.fromkeys(clause))
+            mem.extend((len(clause), 0, 0))
+            mem.extend(clause)
+        arena.num_clauses = len(offsets) - 1
+        return arena
+
+    def add(self, clause, flags=0, lbd=0):
+        """Append a clause, return its reference."""
+        mem = self.mem
+        mem.extend((len(clause), lbd << LBD_SHIFT | flags, 0))
+        cref = len(mem)
+        mem.extend(clause)
+        self.num_clauses += 1
+        return cref
+
+    def delete(self, cref):
+        mem = self.mem
+        mem[cref + FLAGS] |= DELETED
+        self.num_clauses -= 1
+        self.wasted += HEADER + mem[cref + SIZE]
+        if self.first_deleted is None or cref < self.first_deleted:
+            self.first_deleted = cref
+
+    def __getitem__(self, cref):
+        mem = self.mem
+        return mem[cref:cref + mem[cref + SIZE]]
+
+    def __len__(self):
+        return self.num_clauses
+
+    def __iter__(self):
+        mem, cref, end = self.mem, HEADER, len(self.mem)
+        while cref <= end:
+            size = mem[cref + SIZE]
+            if not mem[cref + FLAGS] & DELETED:
+                yield mem[cref:cref + size]
+            cref += size + HEADER
+
+    def crefs(self, learnt=None):
+        """The references of the live clauses in the order of their addition, only the learnt (True) or the original
+        (False) ones unless `learnt` is None."""
+        mem, cref, end = self.mem, HEADER, len(self.mem)
+        while cref <= end:
+            flags = mem[cref + FLAGS]
+            if not flags & DELETED and (learnt is None or bool(flags & LEARNT) == learnt):
+                yield cref
+            cref += mem[cref + SIZE] + HEADER
+
+    def originals(self):
+        mem = self.mem
+        for cref in self.crefs(False):
+            yield mem[cref:cref + mem[cref + SIZE]]
+
+    def is_learnt(self, cref):
+        return self.mem[cref + FLAGS] & LEARNT
+
+    def lbd(self, cref):
+        return self.mem[cref + FLAGS] >> LBD_SHIFT
+
+    def activity(self, cref):
+        return _activity(self.mem[cref + ACTIVITY])
+
+    def set_activity(self, cref, activity):
+        self.mem[cref + ACTIVITY] = _bits(activity)
+
+    def bump(self, cref, inc):
+        """Add `inc` to the activity of a clause and mark it as used."""
+        mem = self.mem
+        mem[cref + ACTIVITY] = _bits(_activity(mem[cref + ACTIVITY]) + inc)
+        mem[cref + FLAGS] |= USED
+
+    def need_compaction(self):
+        return self.wasted > self.garbage * len(self.mem)
+
+    def compact(self):
+        """Move the live clauses behind the first deleted one to the front and drop the deleted ones.
+        Return a dict mapping the old reference of every moved clause to its new one."""
+        moved = {}
+        if self.first_deleted is None:
+            return moved
+        mem, start = self.mem, self.first_deleted - HEADER
+        tail = mem[start:]
+        del mem[start:]
+        cref, end = HEADER, len(tail)
+        while cref <= end:
+            size = tail[cref + SIZE]
+            if not tail[cref + FLAGS] & DELETED:
+                moved[start + cref] = len(mem) + HEADER
+                mem.extend(tail[cref - HEADER:cref + size])
+            cref += size + HEADER
+        self.wasted, self.first_deleted = 0, None
+        return moved
@@ -1,15 +1,35 @@
 import numpy as np
 
 from heuristics import VSIDS, ERWA, RSR, LRB, CHB
+from heuristics.heuristics import count_occurrences
+
+REWARDS = ("decisions", "propagations", "conflicts")
 
 
 class UCB:
-    def __init__(self, sentence, alpha, discount, batch):
+    """Switch between the heuristics (arms) at restarts, choosing the one with the highest upper confidence bound of
+    its rewards. An arm is built the first time it is chosen, from the occurrences of the variables counted once for
+    all the arms, and whenever the bandit switches arms, the new one is seeded with the activity of the one it
+    replaces, rather than going on from its initial or stale weights.
+    The reward of a run (between two restarts) is, by `reward`:
+    'decisions': log2(decisions) / decision levels reached,
+    'propagations': propagated literals per second,
+    'conflicts': conflicts of the run;
+    the last two are divided by the best one so far, to be comparable with the exploration term."""
+    def __init__(self, sentence, alpha, discount, batch, reward="decisions"):
         super().__init__()
-        self.AllHeuristicsChoices = ["VSIDS", "ERWA", "RSR", "LRB", "CHB"]
-        self.Heuristics = [VSIDS(sentence, discount), CHB(sentence, alpha), LRB(sentence, alpha, discount, batch),
-                           ERWA(sentence, alpha), RSR(sentence, alpha)]
+        if reward not in REWARDS:
+            raise ValueError('Unknown bandit reward: {}'.format(reward))
+        self.AllHeuristicsChoices = ["VSIDS", "CHB", "LRB", "ERWA", "RSR"]
         self.num_arms = len(self.AllHeuristicsChoices)
+        self.alpha, self.discount, self.batch = alpha, discount, batch
+        self.occurrences = count_occurrences(sentence)  # shared by the arms
+        self.Heuristics = [None] * self.num_arms  # None until the arm is chosen
+        self.Heuristics[0] = self.build(0)
+
+        self.reward = reward
+        self.best_rate = 0.0  # best throughput of a run so far
+        self.run_start = (0, 0, 0.0)  # propagations, conflicts and seconds of search at the start of the run
 
         self.UCB_values = np.zeros(self.num_arms)
         self.UCB_mean_rewards = np.zeros(self.num_arms)
@@ -19,26 +39,47 @@ class UCB:
         self.current_heuristic_index = 0
         self.num_pulls[0] += 1
 
-    def update_UCB_values(self, ai):
+    def build(self, arm):
+        """Build the heuristic of an arm."""
+        name, occurrences = self.AllHeuristicsChoices[arm], self.occurrences
+        if name == "VSIDS":
+            return VSIDS((), self.discount, occurrences)
+        elif name == "CHB":
+            return CHB((), self.alpha, occurrences)
+        elif name == "LRB":
+            return LRB((), self.alpha, self.discount, self.batch, occurrences)
+        elif name == "ERWA":
+            return ERWA((), self.alpha, occurrences)
+        return RSR((), self.alpha, occurrences)
+
+    def update_UCB_values(self, ai, stats):
         # update UCB_values[self.current_heuristic_index]
         arm = self.current_heuristic_index
         t = self.round
 
-        # denote the number of decisions in this run
-        num_decisions = ai.num_decisions
-        # denote the number of variables fixed by branching
-        num_decidedVars = len(ai.decided_idxs)
-        if num_decidedVars == 0:
-            return
-        current_reward = np.log2(num_decisions) / num_decidedVars
+        start, self.run_start = self.run_start, (stats.propagations, stats.conflicts, stats.seconds)
+        if self.reward == "decisions":
+            # denote the number of decisions in this run
+            num_decisions = ai.num_decisions
+            # denote the number of variables fixed by branching
+            num_decidedVars = len(ai.decided_idxs)
+            if num_decidedVars == 0:
+                return
+            current_reward = np.log2(num_decisions) / num_decidedVars
+        else:
+            if self.reward == "propagations":
+                rate = (stats.propagations - start[0]) / max(stats.seconds - start[2], 1e-6)
+            else:
+                rate = stats.conflicts - start[1]
+            self.best_rate = max(self.best_rate, rate)
+            current_reward = rate / self.best_rate if self.best_rate else 0.0
         self.UCB_mean_rewards[arm] = ((self.num_pulls[arm] - 1) * self.UCB_mean_rewards[arm] + current_reward) / \
                                      self.num_pulls[arm]
         self.UCB_values[arm] = self.UCB_mean_rewards[arm] + np.sqrt(4 * np.log(t) / self.num_pulls[arm])
 
-    def change_heuristic(self, ai):
-
-
-        self.update_UCB_values(ai)
+    def change_heuristic(self, ai, stats):
+        previous = self.Heuristics[self.current_heuristic_index]
+        self.update_UCB_values(ai, stats)
         self.round += 1
         if (self.round - 1) < len(self.AllHeuristicsChoices):
             # Stabilize the algorithm by exploring each arm once at the beginning
@@ -48,4 +89,9 @@ class UCB:
             self.current_heuristic_index = np.argmax(self.UCB_values)
 
         self.num_pulls[self.current_heuristic_index] += 1
-        return self.Heuristics[self.current_heuristic_index]
+        heuristic = self.Heuristics[self.current_heuristic_index]
+        if heuristic is None:
+            heuristic = self.Heuristics[self.current_heuristic_index] = self.build(self.current_heuristic_index)
+        if heuristic is not previous:
+            heuristic.seed(previous.activity())
+        return heuristic
@@ -5,8 +5,8 @@ __all__ = {
 }
 
 
-def init_bandit(sentence, alpha, discount, batch, bandit):
+def init_bandit(sentence, alpha, discount, batch, bandit, reward="decisions"):
     if bandit is None or bandit.lower() == "none":
         return None
     elif bandit.lower() == "ucb":
-        return UCB(sentence, alpha, discount, batch)
+        return UCB(sentence, alpha, discount, batch, reward)
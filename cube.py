@@ -0,0 +1,169 @@
+"""
+cube.py
+cube-and-conquer: a lookahead on the propagation of the solver splits the sentence into cubes (conjunctions of
+literals), which are solved as assumptions by a pool of incremental solvers while the lookahead goes on.
+"""
+import multiprocessing
+import os
+import threading
+from time import time
+
+from CDCL import CDCL
+from tools.utils import verify
+
+
+class Lookahead:
+    """Split the sentence by lookahead: at every node of the search tree, each of the `candidates` unassigned variables
+    occurring the most is assigned both ways with the propagation of the solver, and the variable whose two
+    polarities propagate the most (the largest product of the numbers of propagated literals) is split on.
+    A polarity leading to a conflict is a failed literal: its branch is refuted, and a node where both polarities of a
+    variable fail is refuted as well."""
+
+    def __init__(self, sentence, num_vars, candidates=30):
+        self.solver = CDCL([list(clause) for clause in sentence], num_vars, "VSIDS", 0.4, 0.95, 10)
+        self.candidates = candidates
+        occurrences = [0] * (num_vars + 1)
+        for clause in sentence:
+            for lit in clause:
+                occurrences[abs(lit)] += 1
+        self.order = sorted((var for var in range(1, num_vars + 1) if occurrences[var]),
+                            key=lambda var: -occurrences[var])
+        self.num_nodes, self.num_refuted = 0, 0  # nodes of the lookahead, branches refuted by propagation
+
+    def cubes(self, max_depth, max_cubes):
+        """Generate the cubes of at most max_depth literals, at most max_cubes of them, in depth-first order.
+        Every node gets a share of max_cubes, which is split between its branches, and becomes a cube when its
+        share is 1. Together with the refuted branches, the cubes cover all the assignments."""
+        if self.solver.sentence is None or self.solver._bcp() is not None:
+            self.num_refuted += 1
+            return
+        yield from self._split([], max_depth, max_cubes)
+
+    def _split(self, cube, max_depth, share):
+        self.num_nodes += 1
+        if len(cube) >= max_depth or share <= 1:
+            yield cube
+            return
+        var, branches = self._choose()
+        if var is None:  # no unassigned variable left to split on
+            yield cube
+            return
+        self.num_refuted += 2 - len(branches)
+        for i, lit in enumerate(branches):
+            self._assume(lit)
+            branch_share = share if len(branches) == 1 else (share + 1 - i) // 2
+            yield from self._split(cube + [lit], max_depth, branch_share)
+            self.solver._backtrack(len(self.solver.ai.decided_idxs) - 1)
+
+    def _choose(self):
+        """The variable to split on and its polarities that do not fail, or `(None, [])` if no candidate is left."""
+        value, best, best_score, found = self.solver.ai.value, None, -1, 0
+        for var in self.order:
+            if value[var]:
+                continue
+            counts = [self._probe(var), self._probe(-var)]
+            branches = [lit for lit, count in zip((var, -var), counts) if count is not None]
+            if len(branches) < 2:  # failed literal, no need to look further
+                return var, branches
+            score = (counts[0] + 1) * (counts[1] + 1)
+            if score > best_score:
+                best, best_score = var, score
+            found += 1
+            if found == self.candidates:
+                break
+        return best, [best, -best] if best is not None else []
+
+    def _probe(self, lit):
+        """The number of literals propagated by lit, None if it leads to a conflict."""
+        solver = self.solver
+        level, size = len(solver.ai.decided_idxs), len(solver.ai.assignments)
+        failed = not self._assume(lit)
+        count = len(solver.ai.assignments) - size
+        if not failed:
+            solver._backtrack(level)
+        return None if failed else count
+
+    def _assume(self, lit):
+        """Decide lit at a new level and propagate, return False (and undo the level) if it leads to a conflict."""
+        solver = self.solver
+        level = len(solver.ai.decided_idxs)
+        solver._handle_assign(lit, None, True)
+        if solver._bcp() is None:
+            return True
+        solver._backtrack(level)
+        return False
+
+
+_solver = None  # the incremental solver of a worker process
+
+
+def _init_worker(sentence, num_vars, heuristic, restart, alpha, discount, batch):
+    global _solver
+    _solver = CDCL([list(clause) for clause in sentence], num_vars, heuristic, alpha, discount, batch, restart,
+                   dbp="LBD")
+
+
+def _solve_cube(cube):
+    """Solve the sentence under the cube, return `(cube, status, model, core, seconds)`. Learned clauses are kept for
+    the next cubes of the same worker."""
+    start_time = time()
+    model, _, _, _ = _solver.solve(cube)
+    return cube, "UNSAT" if model is None else "SAT", model, _solver.core, time() - start_time
+
+
+def solve_cubes(sentence, num_vars, max_depth=10, max_cubes=256, jobs=None, timeout=None, heuristic="VSIDS",
+                restart="MLR", alpha=0.4, discount=0.95, batch=10, candidates=30):
+    """Cube-and-conquer: the cubes of the lookahead are solved by `jobs` worker processes as soon as they are
+    generated. Stop on the first verified SAT answer; the answer is UNSAT only when all the cubes are refuted.
+    A cube containing the failed assumptions of a refuted cube is refuted without being solved.
+    Return `(status, model, stats)`, status is 'SAT', 'UNSAT' or 'UNKNOWN' (timeout)."""
+    start_time = time()
+    deadline = None if timeout is None else start_time + timeout
+    jobs = jobs or os.cpu_count() or 1
+    lookahead = Lookahead(sentence, num_vars, candidates)
+    cores = []  # failed assumptions of the refuted cubes
+    stats = {"cubes": 0, "solved": 0, "refuted by core": 0, "solve time": 0.0}
+    pending, stopped = threading.Semaphore(2 * jobs), False  # cubes handed out but not solved yet
+
+    def stream():  # run by the task thread of the pool, which blocks while enough cubes are pending
+        for cube in lookahead.cubes(max_depth, max_cubes):
+            pending.acquire()
+            literals = set(cube)
+            if stopped:
+                return
+            if any(core <= literals for core in cores):
+                pending.release()
+                stats["refuted by core"] += 1
+                continue
+            stats["cubes"] += 1
+            yield cube
+
+    method = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+    status, model = "UNSAT", None
+    params = (sentence, num_vars, heuristic, restart, alpha, discount, batch)
+    with multiprocessing.get_context(method).Pool(jobs, _init_worker, params) as pool:
+        results = pool.imap_unordered(_solve_cube, stream())
+        while True:
+            try:
+                cube, cube_status, cube_model, core, seconds = \
+                    results.next(None if deadline is None else max(0.0, deadline - time()))
+            except StopIteration:
+                break
+            except multiprocessing.TimeoutError:
+                status = "UNKNOWN"
+                break
+            pending.release()
+            stats["solved"] += 1
+            stats["solve time"] += seconds
+            if cube_status == "SAT":
+                if verify(sentence, cube_model):
+                    status, model = "SAT", cube_model
+                else:
+                    status = "UNKNOWN"  # a wrong model, the cube is not refuted either
+                break
+            cores.append(set(core))
+        stopped = True
+        pending.release()  # wake up the task thread
+        pool.terminate()  # cancel the remaining cubes
+    stats.update(nodes=lookahead.num_nodes, refuted=lookahead.num_refuted, time=time() - start_time)
+    return status, model, stats
@@ -4,7 +4,8 @@ from tkinter.ttk import Combobox
 import time
 
 from CDCL import CDCL
-from tools.utils import read_cnf
+from arena import ClauseArena
+from tools.utils import open_cnf, read_cnf, read_cnf_flat
 
 startTime = time.time()
 
@@ -15,7 +16,7 @@ class Window(Frame):
         self.master = master
         self.master.title("SAT Solver")
 
-        f1 = Frame(master, width=1200, height=150)
+        f1 = Frame(master, width=1200, height=180)
         f2 = Frame(master, width=1200, height=550)
         f1.pack()
         f2.pack()
@@ -48,10 +49,18 @@ class Window(Frame):
         self.ppLabel = Label(f1, text='Preprocess Policy:')
         self.ppLabel.place(x=0, y=120)
         self.pp = Combobox(f1)
-        self.pp['values'] = ("None", "niver", "lighter-niver", "li-niver-withple")
+        self.pp['values'] = ("None", "niver", "lighter-niver", "li-niver-withple", "bve", "subsume",
+                              "subsume+lighter-niver")
         self.pp.current(0)
         self.pp.place(x=130, y=120)
 
+        self.phLabel = Label(f1, text='Phase:')
+        self.phLabel.place(x=0, y=150)
+        self.ph = Combobox(f1)
+        self.ph['values'] = ("save", "target", "best")
+        self.ph.current(0)
+        self.ph.place(x=130, y=150)
+
         self.tpLabel = Label(f1, text='Time for Preprocessing:')
         self.tpLabel.place(x=300, y=30)
         self.tp = Label(f1, text='0.0000s')
@@ -85,7 +94,8 @@ class Window(Frame):
         self.result.pack(side=LEFT, fill=BOTH, expand=1)
 
     def browseFile(self):
-        self.file['text'] = filedialog.askopenfilename(filetypes=[("CNF files", "*.cnf")], title="Choose a CNF file",
+        self.file['text'] = filedialog.askopenfilename(filetypes=[("CNF files", "*.cnf *.cnf.gz *.cnf.xz *.cnf.bz2")],
+                                                       title="Choose a CNF file",
                                                        initialdir="./examples")
 
     def updateTime(self):
@@ -95,15 +105,21 @@ class Window(Frame):
 
     def start(self):
         global startTime
-        with open(self.file['text'], "r") as f:
-            sentence, num_vars = read_cnf(f)
+        with open_cnf(self.file['text']) as f:
+            if self.pp.get() == "None":  # straight into the clause arena of the solver
+                literals, offsets, num_vars = read_cnf_flat(f)
+                sentence = ClauseArena.from_flat(literals, offsets)
+                del literals, offsets
+            else:
+                sentence, num_vars = read_cnf(f)
         cdcl = CDCL(sentence, num_vars, self.aa.get(), self.alpha.get(), self.discount.get(),
-                    self.batch.get(), self.rp.get(), self.rb.get(), self.pp.get())
+                    self.batch.get(), self.rp.get(), self.rb.get(), self.pp.get(), phase=self.ph.get())
+        del sentence  # the solver holds the formula (or its preprocessed copy)
         # Process(target=self.updateTime).start()
-        result, preprocess_time, solve_time = cdcl.solve()
+        result, preprocess_time, solve_time, _ = cdcl.solve()
         self.result.insert(END, f"""Config:{self.file['text'].split('/')[-1], self.aa.get(), self.alpha.get(),
                                             self.discount.get(), self.batch.get(), self.rp.get(), self.rb.get(),
-                                            self.pp.get()}\nResult:{result}\n\n""")
+                                            self.pp.get(), self.ph.get()}\nResult:{result}\n\n""")
         self.tp['text'] = f"{preprocess_time:.4f}s"
         self.ts['text'] = f"{solve_time:.4f}s"
 
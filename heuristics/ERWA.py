@@ -1,19 +1,19 @@
-from bisect import insort
 from .heuristics import Heuristic
 
 
 class ERWA(Heuristic):
     """Exponential Recency Weighted Average(ERWA) algorithm."""
-    def __init__(self, sentence, alpha=0.4):
-        super().__init__()
+    def __init__(self, sentence, alpha=0.4, occurrences=None):
+        super().__init__(sentence, occurrences)
         self.alpha = alpha
         self.learn_counter = 0
-        self.assigned_at, self.participated_in = {}, {}
-        for clause in sentence:
-            for literal in clause:
-                self.weights[literal] = 0.0
-                self.assigned_at[literal] = 0
-                self.participated_in[literal] = 0
+        self.assigned_at = [0] * len(self.weights)  # variable -> learn_counter at its last assignment
+        self.participated_in = [0] * len(self.weights)  # variable -> conflicts it took part in since then
+
+    def add_variable(self, var):
+        for values in (self.assigned_at, self.participated_in):
+            values.extend([0] * (var + 1 - len(values)))
+        super().add_variable(var)
 
     def after_conflict_analysis(self, learnt_clause_literals, conflict_side_literals, sentence=None, assign_info=None):
         """Called after a learnt clause is generated from conflict analysis.
@@ -23,19 +23,20 @@ class ERWA(Heuristic):
         self.learn_counter += 1
         self.alpha = max(0.06, self.alpha - 1e-6)
         for literal in learnt_clause_literals:
-            self.participated_in[literal] += 1
+            self.participated_in[abs(literal)] += 1
         for literal in conflict_side_literals:
-            self.participated_in[literal] += 1
+            self.participated_in[abs(literal)] += 1
 
     def on_assign(self, literal):
         """Called when a literal is assigned or propagated.
         """
-        self.assigned_at[literal] = self.learn_counter
-        self.participated_in[literal] = 0
+        self.assigned_at[abs(literal)] = self.learn_counter
+        self.participated_in[abs(literal)] = 0
 
     def on_unassign(self, literal):
         """Called when a literal is unassigned by backtracking or restart."""
-        interval = self.learn_counter - self.assigned_at[literal]
+        var = abs(literal)
+        interval = self.learn_counter - self.assigned_at[var]
         if interval > 0:
-            reward = float(self.participated_in[literal]) / interval
-            self.weights[literal] = self.alpha * reward + (1 - self.alpha) * self.weights[literal]
\ No newline at end of file
+            reward = float(self.participated_in[var]) / interval
+            self.weights[var] = self.alpha * reward * self.inc + (1 - self.alpha) * self.weights[var]
\ No newline at end of file
@@ -1,37 +1,37 @@
-from bisect import insort
-from .heuristics import Heuristic
+from .heuristics import Heuristic, count_occurrences
 
 
 class VSIDS(Heuristic):
     """
     The variable state independent decaying sum(VSIDS) alogrithm.
     :field decay: the multiplicative decay factor
-    :field vsids_scores: the state scores of each literal
+    :field vsids_scores: the state scores of each variable
     """
-    def __init__(self, sentence, decay=0.95):
-        super().__init__()
+    def __init__(self, sentence, decay=0.95, occurrences=None):
+        if occurrences is None:
+            occurrences = count_occurrences(sentence)
+        super().__init__(sentence, occurrences)
         self.decay = decay
-        # scores = {}
-        for clause in sentence:
-            for literal in clause:
-                self.weights[literal] = self.weights.get(literal, 0) + 1
+        for var, count in occurrences.items():
+            self.weights[var] = count
 
     def after_conflict_analysis(self, learnt_clause_literals, conflict_side_literals, sentence=None, assign_info=None):
         """Called after a learnt clause is generated from conflict analysis.
+        Bump the variables of the learnt clause and the conflict side, then decay all scores.
         :param sentence:
         :param assign_info:
         """
+        for lit in learnt_clause_literals:
+            self.weights[abs(lit)] += self.inc
+        for lit in conflict_side_literals:
+            self.weights[abs(lit)] += self.inc
+        self._decay_all(self.decay)
         self.update_weights(learnt_clause_literals)
+        self.update_weights(conflict_side_literals)
 
-    def update_weights(self, learned_clause):
-        """Update VSIDS scores.
-        note that the sorting order should be maintained"""
-        increased = []
-        for lit in learned_clause:
-            increased.append((lit, (self.weights.pop(lit) + 1) * self.decay))
-        scores = [(i[0], i[1] * self.decay) for i in self.weights.items()]
-        for i in increased:
-            # use binary insert method for accelerating the operation of maintaining order
-            insort(scores, i, key=lambda key: key[1])
-        self.weights.clear()
-        self.weights.update(scores)
+    def add_variable(self, var):
+        """A new variable starts as if it has been bumped once, instead of below all the variables ever bumped."""
+        self.weights.extend([None] * (var + 1 - len(self.weights)))
+        self.weights[var] = self.inc
+        if self.heap is not None:
+            self.heap.update(var, self._key(var))
@@ -0,0 +1,96 @@
+"""
+heap.py
+an indexed binary max-heap of variables, used as the decision queue of all heuristic branching algorithms.
+"""
+
+
+class VarHeap:
+    """Binary max-heap of variables ordered by their keys.
+    The position of every variable in the heap is indexed, so that the key of a variable can be increased or decreased
+    in O(log n). Assigned variables are removed lazily: they stay in the heap until they are popped, and are pushed
+    back when they get unassigned. Keys and positions are kept in lists indexed by variable."""
+    def __init__(self, keys):
+        """Build the heap from a list of the keys indexed by variable, None for the variables left out."""
+        self.keys = list(keys)
+        self.heap = [var for var, key in enumerate(self.keys) if key is not None]
+        self.indices = [-1] * len(self.keys)  # variable -> its position in the heap, -1 if not in it
+        for i, var in enumerate(self.heap):
+            self.indices[var] = i
+        for i in range(len(self.heap) // 2 - 1, -1, -1):
+            self._sift_down(i)
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __contains__(self, var):
+        return var < len(self.indices) and self.indices[var] >= 0
+
+    def top(self):
+        """Return the variable with the highest key without removing it."""
+        return self.heap[0]
+
+    def pop(self):
+        """Remove and return the variable with the highest key."""
+        heap = self.heap
+        var = heap[0]
+        last = heap.pop()
+        self.indices[var] = -1
+        if heap:
+            heap[0] = last
+            self.indices[last] = 0
+            self._sift_down(0)
+        return var
+
+    def update(self, var, key):
+        """Set the key of a variable, inserting the variable if it is not in the heap."""
+        if var >= len(self.keys):
+            self.keys.extend([None] * (var + 1 - len(self.keys)))
+            self.indices.extend([-1] * (var + 1 - len(self.indices)))
+        self.keys[var] = key
+        i = self.indices[var]
+        if i < 0:
+            i = len(self.heap)
+            self.heap.append(var)
+            self.indices[var] = i
+            self._sift_up(i)
+        elif i > 0 and key > self.keys[self.heap[(i - 1) >> 1]]:
+            self._sift_up(i)
+        else:
+            self._sift_down(i)
+
+    def rescale(self, factor):
+        """Multiply all keys by a positive factor, which keeps the order of the heap."""
+        self.keys[:] = [key * factor if key is not None else None for key in self.keys]
+
+    def _sift_up(self, i):
+        heap, indices, keys = self.heap, self.indices, self.keys
+        var = heap[i]
+        key = keys[var]
+        while i > 0:
+            parent = (i - 1) >> 1
+            if keys[heap[parent]] >= key:
+                break
+            heap[i] = heap[parent]
+            indices[heap[i]] = i
+            i = parent
+        heap[i] = var
+        indices[var] = i
+
+    def _sift_down(self, i):
+        heap, indices, keys = self.heap, self.indices, self.keys
+        var = heap[i]
+        key = keys[var]
+        n = len(heap)
+        while True:
+            child = 2 * i + 1
+            if child >= n:
+                break
+            if child + 1 < n and keys[heap[child + 1]] > keys[heap[child]]:
+                child += 1
+            if keys[heap[child]] <= key:
+                break
+            heap[i] = heap[child]
+            indices[heap[i]] = i
+            i = child
+        heap[i] = var
+        indices[var] = i
@@ -1,24 +1,47 @@
 """
 heuristics.py
-define some algorithm/policy to decide which literal to be assigned next.
+define some algorithm/policy to decide which variable to be assigned next, the polarity is chosen by the phase policy
+of the assignment information.
 """
-from bisect import insort
 from abc import ABC, abstractmethod
+from collections import Counter
+from itertools import chain
+
+from .heap import VarHeap
+
+
+def count_occurrences(sentence):
+    """Counter of the occurrences of every variable in the sentence."""
+    return Counter(map(abs, chain.from_iterable(sentence)))
 
 
 class Heuristic(ABC):
     """The abstract base class for all heuristic branching algorithm of CDCL SAT solver"""
-    def __init__(self):
-        """Initialize the weights for all literals
-        It needs to be keep in ascending order"""
-        self.weights = {}
-
-    def decide(self, assigned):
-        """Used to decide which **literal** to be assigned next
-        always choose the literal with the highest weight"""
-        for literal in reversed(self.weights):
-            if literal not in assigned and -literal not in assigned:
-                return literal
+    def __init__(self, sentence, occurrences=None):
+        """Initialize the weights of the variables of the sentence to 0.
+        Weights are kept in a list indexed by variable, None for the variables that do not occur in the sentence
+        (e.g. eliminated by preprocessing), which are never decided. The sentence is not walked again if the
+        `occurrences` of its variables (see count_occurrences) are given, e.g. shared by the arms of a bandit.
+        Variables are kept in a max-heap ordered by their weights. Instead of decaying all
+        weights, `inc` grows, and a reward is worth `inc` times as much weight as it was in the beginning."""
+        if occurrences is None:
+            occurrences = count_occurrences(sentence)
+        self.weights = [None] * (max(occurrences, default=0) + 1)
+        for var in occurrences:
+            self.weights[var] = 0
+        self.inc = 1.0
+        self.heap = None  # built on the first decision, once the subclass has initialized the weights
+
+    def decide(self, assign_info):
+        """Used to decide which **variable** to be assigned next
+        always choose the unassigned variable with the highest weight"""
+        if self.heap is None:
+            self.on_restart()
+        heap, value = self.heap, assign_info.value
+        while heap:
+            var = heap.pop()
+            if not value[var]:
+                return var
         return None
 
     def after_bcp(self, conflict_ante):
@@ -44,13 +67,72 @@ class Heuristic(ABC):
         """Called when a literal is unassigned by backtracking or restart."""
         pass
 
+    def has_variable(self, var):
+        """Whether the variable has a weight, i.e. it occurs in the sentence or has been added since."""
+        return var < len(self.weights) and self.weights[var] is not None
+
+    def add_variable(self, var):
+        """Called when a clause added between two solves mentions a variable the heuristic has not seen yet."""
+        self.weights.extend([None] * (var + 1 - len(self.weights)))
+        self.weights[var] = 0
+        if self.heap is not None:
+            self.heap.update(var, self._key(var))
+
+    def activity(self):
+        """The weights divided by the largest one, a scale any heuristic can be seeded with (see seed)."""
+        top = max((weight for weight in self.weights if weight is not None), default=0) or 1.0
+        return [weight / top if weight is not None else None for weight in self.weights]
+
+    def seed(self, activity):
+        """Take over the search from another heuristic: the weights become its `activity` times `inc`, so the
+        variables it found active are decided first, until the rewards of this heuristic reorder them."""
+        for var, value in enumerate(activity):
+            if value is not None:
+                if not self.has_variable(var):
+                    self.add_variable(var)
+                self.weights[var] = value * self.inc
+        self.heap = None  # rebuilt on the next decision or restart
+
+    def on_restart(self):
+        """Called when the heuristic takes over the search at a restart, rebuild the order of all variables."""
+        self.heap = VarHeap([self._key(var) if weight is not None else None for var, weight in enumerate(self.weights)])
+
+    def reusable_level(self, assign_info):
+        """The number of decision levels a restart can keep, since deciding again would reassign them in the same
+        order: the leading levels whose decision variable weighs at least as much as the best unassigned variable."""
+        heap, value = self.heap, assign_info.value
+        if heap is None:
+            return 0
+        while heap and value[heap.top()]:  # drop the assigned variables left in the heap
+            heap.pop()
+        if not heap:
+            return len(assign_info.decided_idxs)
+        best, level = heap.keys[heap.top()], 0
+        for idx in assign_info.decided_idxs:
+            if heap.keys[abs(assign_info.assignments[idx])] < best:
+                break
+            level += 1
+        return level
+
     def update_weights(self, literals):
-        """Rearrange order of literals whose weight changed, maintain them in ascending order."""
-        need_adjust_order = []
+        """Reposition the variables of literals whose weight changed, and put them back to the heap if they have
+        been popped out."""
+        if self.heap is None:
+            return
         for lit in literals:
-            need_adjust_order.append((lit, self.weights.pop(lit)))
-        weight = list(self.weights.items())
-        for i in need_adjust_order:
-            insort(weight, i, key=lambda key: key[1])
-        self.weights.clear()
-        self.weights.update(weight)
+            var = abs(lit)
+            self.heap.update(var, self._key(var))
+
+    def _decay_all(self, factor):
+        """Multiply the weights of all variables by `factor` < 1 in O(1), by growing `inc` instead."""
+        self.inc /= factor
+        if self.inc > 1e100:  # rescale before overflow, the order is not changed
+            self.weights[:] = [weight * 1e-100 if weight is not None else None for weight in self.weights]
+            if self.heap is not None:
+                self.heap.rescale(1e-100)
+            self.inc *= 1e-100
+
+    def _key(self, var):
+        """The key of a variable in the heap"""
+        return self.weights[var]
+
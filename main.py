@@ -1,25 +1,139 @@
-from CDCL import CDCL
-from tools.utils import read_cnf, verify
+import signal
+import threading
+
+from CDCL import CDCL, UNKNOWN
+from arena import ClauseArena
+from cube import solve_cubes
+from portfolio import portfolio_configs, solve_portfolio
+from preprocess import Subsumption
+from tools.cache import FormulaCache
+from tools.profiler import Profiler
+from tools.proof import DratProof
+from tools.utils import open_cnf, read_cnf, read_cnf_flat, verify_file
 from tools.args import parse_args
 
 
 def main(args):
+    cache = FormulaCache(args.cache_dir, args.cache_size << 20)
+    if args.clear_cache:
+        cache.clear()
+    if args.no_cache:
+        cache = None
+
     # Create problem.
-    with open(args.input, "r") as f:
-        sentence, num_vars = read_cnf(f)
-    origin_sentence = list(sentence)
+    preprocess = args.preprocess_policy is not None and args.preprocess_policy.lower() != "none"
+    if not (preprocess or args.portfolio or args.cube):  # straight into the clause arena, without a list per clause
+        with open_cnf(args.input) as f:
+            literals, offsets, num_vars = read_cnf_flat(f)
+        sentence = ClauseArena.from_flat(literals, offsets)
+        del literals, offsets
+    elif cache is not None:
+        sentence, num_vars = cache.read_cnf(args.input)
+    else:
+        with open_cnf(args.input) as f:
+            sentence, num_vars = read_cnf(f)
+    if args.portfolio:
+        portfolio(args, sentence, num_vars)
+        return
+    if args.cube:
+        cube_and_conquer(args, sentence, num_vars)
+        return
+    # a preprocessed formula from the cache has no proof steps, it is preprocessed again
+    preprocessor = cache.load(args.input, args.preprocess_policy) if cache is not None and preprocess and \
+        args.proof is None else None
+    proof = DratProof(args.proof, not args.text_proof) if args.proof is not None else None
 
     # Create CDCL solver and solve it!
     cdcl = CDCL(sentence, num_vars, args.assignment_algorithm, args.alpha, args.discount, args.batch,
-                args.restart_policy, args.bandit, args.preprocess_policy)
-    res, t1, t2 = cdcl.solve()
+                args.restart_policy, args.bandit, args.preprocess_policy,
+                args.reduce_policy, args.reduce_schedule, args.keep_tiers, args.reuse_trail, args.phase, preprocessor,
+                args.probe, progress_interval=args.progress, proof=proof, bandit_reward=args.bandit_reward)
+    del sentence  # the solver holds the formula (or its preprocessed copy), the parsed one is not kept for the search
+    if cache is not None and preprocess and preprocessor is None:
+        cache.store(args.input, args.preprocess_policy, cdcl.sentence, num_vars, cdcl.preprocessor.removed_clause)
+    profiler = Profiler() if args.profile is not None else None
+    if profiler is not None:
+        profiler.attach(cdcl)
+    interrupt = threading.Event()
+
+    def on_interrupt(signum, frame):  # the first Ctrl-C stops the search with the statistics, the second one exits
+        interrupt.set()
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+
+    signal.signal(signal.SIGINT, on_interrupt)
+    res, t1, t2, stats = cdcl.solve(conflicts=args.conflicts, propagations=args.propagations,
+                                    seconds=args.time_limit, memory=args.memory_limit, interrupt=interrupt)
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    if proof is not None:
+        proof.close()
 
     if res is None: print("✘ No solution found")
+    elif res is UNKNOWN:
+        reason = cdcl.budget.reason
+        print(f"? Unknown, {'interrupted' if reason == 'interrupted' else f'the {reason} budget ran out'}")
     else:
         print(f"✔ Successfully found a solution: {res}")
-        print(f"The solution is verified to be {verify(origin_sentence, res)}")
-    print(f"{t1} seconds for preprocessing")
+        with open_cnf(args.input) as f:  # read again rather than keep a copy of the sentence during the search
+            falsified = verify_file(f, res)
+        print(f"The solution is verified to be {falsified is None}"
+              f"{f', clause {falsified} is falsified' if falsified is not None else ''}")
+    print(f"{t1} seconds for preprocessing{' (loaded from cache)' if preprocessor is not None else ''}")
+    if isinstance(cdcl.preprocessor, Subsumption):
+        print(f"{cdcl.preprocessor.time_for_subsumption} seconds for subsumption, removed "
+              f"{cdcl.preprocessor.num_subsumed} clauses and {cdcl.preprocessor.num_removed_literals} literals "
+              f"({cdcl.preprocessor.num_strengthened} by strengthening)")
     print(f"{t2} seconds elapsed for solving")
+    if args.probe:
+        print(f"{cdcl.time_for_probe} seconds for probing, {len(cdcl.equivalences)} equivalent literals substituted, "
+              f"{cdcl.num_failed_literals} failed literals and {cdcl.num_probe_units} other units found")
+    print(f"{cdcl.time_for_restart} seconds for {cdcl.num_restarts} restarts")
+    if cdcl.sentence is not None:
+        print(f"{cdcl.time_for_analysis} seconds for conflict analysis, learned clauses minimized from "
+              f"{cdcl.ai.num_learned_literals} to {cdcl.ai.num_minimized_literals} literals")
+    if cdcl.dbp is not None:
+        print(f"{cdcl.num_learned()} learned clauses alive, "
+              f"{cdcl.dbp.num_deleted} deleted in {cdcl.dbp.num_reductions} reductions")
+    print(stats)
+    if proof is not None:
+        print(f"c DRAT proof {args.proof}: {proof.num_added} clauses added, {proof.num_deleted} deleted")
+    if profiler is not None:
+        print(profiler)
+        if args.profile:
+            profiler.dump(args.profile)
+
+
+def portfolio(args, sentence, num_vars):
+    """Solve with the portfolio, the model is verified before it wins."""
+    status, res, stats = solve_portfolio(sentence, num_vars, portfolio_configs(args.portfolio), args.jobs,
+                                         args.timeout, args.alpha, args.discount, args.batch, args.share)
+    if status == "SAT": print(f"✔ Successfully found a verified solution: {res}")
+    elif status == "UNSAT": print("✘ No solution found")
+    else: print("? Unknown, no worker answered in time")
+    for i, worker in enumerate(stats):
+        config = worker["config"]
+        line = f"worker {i} {config.heuristic} restart={config.restart} bandit={config.bandit} " \
+               f"preprocess={config.preprocess} phase={config.phase} seed={config.seed}: {worker['status']}"
+        if "time" in worker:
+            line += f", {worker['time']:.3f} seconds, {worker['restarts']} restarts, " \
+                    f"{worker['conflicts']} conflicts, {worker['learned']} learned clauses alive"
+        if "exported" in worker:
+            line += f", {worker['exported']} clauses exported, {worker['imported']} imported " \
+                    f"({worker['useful']} useful, {worker['dropped']} dropped)"
+        print(line)
+
+
+def cube_and_conquer(args, sentence, num_vars):
+    """Solve the cubes of the lookahead in parallel, the model is verified before it wins."""
+    status, res, stats = solve_cubes(sentence, num_vars, args.cube, args.max_cubes, args.jobs, args.timeout,
+                                     args.assignment_algorithm, args.restart_policy, args.alpha, args.discount,
+                                     args.batch)
+    if status == "SAT": print(f"✔ Successfully found a verified solution: {res}")
+    elif status == "UNSAT": print("✘ No solution found, all the cubes are refuted")
+    else: print("? Unknown, the cubes were not all solved in time")
+    print(f"{stats['time']} seconds elapsed, {stats['nodes']} lookahead nodes, {stats['refuted']} branches refuted "
+          f"by propagation")
+    print(f"{stats['cubes']} cubes generated, {stats['solved']} solved in {stats['solve time']} seconds, "
+          f"{stats['refuted by core']} refuted by the failed assumptions of another cube")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,157 @@
+"""
+portfolio.py
+run several configurations of the CDCL solver on the same sentence in parallel processes, the first definitive answer
+wins and the other workers are cancelled.
+"""
+import multiprocessing
+import os
+import queue
+import random
+import signal
+from collections import namedtuple
+from time import time
+
+from CDCL import CDCL
+from tools.sharing import ClauseExchange, ClauseRing
+from tools.utils import verify
+
+Config = namedtuple("Config", "heuristic restart bandit preprocess phase seed",
+                    defaults=("MLR", None, None, "save", 0))
+Config.__doc__ = """A configuration of a worker. A seed other than 0 shuffles the order of the clauses, which changes the
+watches and breaks the ties of the heuristic differently."""
+
+# ordered by diversity, the first n are run by a portfolio of size n
+DEFAULT_PORTFOLIO = [
+    Config("VSIDS", "MLR", None, "lighter-NiVER"),
+    Config("LRB", "MLR"),
+    Config("CHB", "MLR", None, "BVE"),
+    Config("VSIDS", "MLR", "UCB"),
+    Config("RSR", "MLR", None, "subsume+lighter-NiVER", "target"),
+    Config("VSIDS", "MLR", None, None, "best", 1),
+    Config("ERWA", None, None, "lighter-NiVER"),
+    Config("LRB", "MLR", None, "BVE", "target", 2),
+]
+
+
+class _Cancelled(Exception):
+    """Raised in a worker by SIGTERM."""
+
+
+def portfolio_configs(n):
+    """The first n configurations of the default portfolio, repeated with other seeds if n is larger."""
+    size = len(DEFAULT_PORTFOLIO)
+    return [DEFAULT_PORTFOLIO[i % size]._replace(seed=DEFAULT_PORTFOLIO[i % size].seed + i // size * size)
+            for i in range(n)]
+
+
+def _shuffled(sentence, seed):
+    if not seed:
+        return [list(clause) for clause in sentence]
+    sentence = [list(clause) for clause in sentence]
+    random.Random(seed).shuffle(sentence)
+    return sentence
+
+
+def _stats(cdcl, exchange, elapsed):
+    """Statistics of a worker, with whatever the solver has counted so far."""
+    stats = {"time": elapsed, "restarts": 0, "conflicts": 0, "learned": 0}
+    if cdcl is not None:
+        stats["restarts"] = cdcl.num_restarts
+        stats["learned"] = cdcl.num_learned()
+        stats["conflicts"] = cdcl.stats.conflicts
+    if exchange is not None:
+        stats.update(exported=exchange.num_exported, imported=exchange.num_imported, useful=exchange.num_useful,
+                     dropped=exchange.num_dropped)
+    return stats
+
+
+def _worker(idx, config, sentence, num_vars, params, ring, results):
+    """Solve the sentence with one configuration and put `(idx, status, model, stats)` on the results queue.
+    Learned clauses are shared through the ring if it is not None.
+    SIGTERM cancels the search, and the statistics so far are still reported."""
+    start_time, cdcl = time(), None
+    exchange = ClauseExchange(ring, idx) if ring is not None else None
+
+    def cancel(signum, frame):
+        raise _Cancelled
+
+    signal.signal(signal.SIGTERM, cancel)
+    try:
+        cdcl = CDCL(_shuffled(sentence, config.seed), num_vars, config.heuristic, params["alpha"], params["discount"],
+                    params["batch"], config.restart, config.bandit, config.preprocess, "LBD", phase=config.phase,
+                    exchange=exchange)
+        model, _, _, _ = cdcl.solve()
+        status = "UNSAT" if model is None else "SAT"
+    except _Cancelled:
+        status, model = "cancelled", None
+    except Exception as e:  # reported, the other workers may still answer
+        status, model = f"error: {e!r}", None
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    results.put((idx, status, model, _stats(cdcl, exchange, time() - start_time)))
+
+
+def solve_portfolio(sentence, num_vars, configs, jobs=None, timeout=None, alpha=0.4, discount=0.95, batch=10,
+                    share=False):
+    """Run the configurations in at most `jobs` processes at a time (one per core by default), until one of them
+    answers SAT with a verified model or UNSAT, or `timeout` seconds have elapsed.
+    With `share`, the workers exchange short learned clauses through shared memory (see tools.sharing).
+    Return `(status, model, stats)`: status is 'SAT', 'UNSAT' or 'UNKNOWN', and stats holds a dict per configuration
+    with its status, e.g. 'cancelled', 'not started' or 'invalid model'."""
+    jobs = jobs or os.cpu_count() or 1
+    deadline = None if timeout is None else time() + timeout
+    method = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"  # fork shares the sentence
+    context = multiprocessing.get_context(method)
+    results = context.Queue()
+    params = {"alpha": alpha, "discount": discount, "batch": batch}
+    ring = ClauseRing() if share else None
+    stats = [{"config": config, "status": "not started"} for config in configs]
+    waiting, running = list(range(len(configs))), {}
+    status, model = "UNKNOWN", None
+    while status == "UNKNOWN" and (waiting or running):
+        while waiting and len(running) < jobs:
+            idx = waiting.pop(0)
+            running[idx] = context.Process(target=_worker,
+                                           args=(idx, configs[idx], sentence, num_vars, params, ring, results),
+                                           daemon=True)
+            running[idx].start()
+        if deadline is not None and time() >= deadline:
+            break
+        report = _next_report(results, running, stats)
+        if report is None:
+            continue
+        idx, worker_status, worker_model = report
+        if worker_status == "SAT" and not verify(sentence, worker_model):
+            stats[idx]["status"] = "invalid model"
+        elif worker_status in ("SAT", "UNSAT"):
+            status, model = worker_status, worker_model
+    for process in running.values():
+        process.terminate()
+    grace = time() + 5
+    while running:  # the cancelled workers still report their statistics
+        _next_report(results, running, stats, grace)
+    if ring is not None:
+        ring.close()
+        ring.unlink()
+    return status, model, stats
+
+
+def _next_report(results, running, stats, deadline=None):
+    """Wait shortly for the next report of a running worker, record its statistics and return `(idx, status, model)`.
+    A worker that died without reporting is recorded as such, and the workers still running after `deadline` are
+    killed. Return None if nothing was reported."""
+    try:
+        idx, status, model, worker_stats = results.get(timeout=0.1)
+    except queue.Empty:
+        for idx, process in list(running.items()):
+            if not process.is_alive() and process.exitcode != 0:  # a worker that reported exits with 0
+                del running[idx]
+                stats[idx]["status"] = "cancelled" if process.exitcode == -signal.SIGTERM else \
+                    f"crashed (exit code {process.exitcode})"
+        if deadline is not None and time() >= deadline:
+            for idx in list(running):  # gave up waiting
+                running.pop(idx).kill()
+                stats[idx]["status"] = "killed"
+        return None
+    running.pop(idx).join()
+    stats[idx].update(worker_stats, status=status)
+    return idx, status, model
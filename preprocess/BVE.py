@@ -0,0 +1,99 @@
+import heapq
+from time import time
+
+from .NiVER import NiVER
+
+
+class BVE(NiVER):
+    """Preprocess based on bounded variable elimination (BVE)
+    Variables are tried from a heap in increasing order of the product of their positive and negative occurrences.
+    A variable is eliminated if its non-tautological resolvents are no more than the clauses they replace plus `grow`,
+    and none of them is longer than `resolvent_limit`. Variables occurring more than `occurrence_limit` times are
+    skipped. After an elimination only the variables of the removed and added clauses are queued again.
+    Preprocessing stops when `step_limit` resolution steps or `time_limit` seconds are used up."""
+
+    def __init__(self, sentence, num_vars, resolvent_limit=16, grow=0, occurrence_limit=64, step_limit=2000000,
+                 time_limit=10.0, frozen=(), proof=None):
+        super().__init__(sentence, num_vars, False, frozen=frozen, proof=proof)
+        self.resolvent_limit = resolvent_limit
+        self.grow = grow
+        self.occurrence_limit = occurrence_limit
+        self.step_limit = step_limit
+        self.time_limit = time_limit
+        self.num_steps = 0  # resolution steps used
+
+    def preprocess(self):
+        """The main part for preprocess with BVE algorithm."""
+        start_time = time()
+        num_occ, sentence = self.num_occ, self.sentence
+        queued = [False] * (self.num_vars + 1)
+        heap = []
+        for var in range(1, self.num_vars + 1):
+            if num_occ[var] and num_occ[-var] and var not in self.frozen:
+                heap.append((num_occ[var] * num_occ[-var], var))
+                queued[var] = True
+        heapq.heapify(heap)
+        while heap:
+            if self.num_steps > self.step_limit or time() - start_time > self.time_limit:
+                break
+            cost, var = heapq.heappop(heap)
+            if num_occ[var] * num_occ[-var] != cost:  # outdated by an elimination, queue it with its current cost
+                if num_occ[var] and num_occ[-var]:
+                    heapq.heappush(heap, (num_occ[var] * num_occ[-var], var))
+                else:
+                    queued[var] = False
+                continue
+            queued[var] = False
+            if num_occ[var] + num_occ[-var] > self.occurrence_limit:
+                continue
+            resolvents = self._resolvents(var)
+            if resolvents is None:
+                continue
+            if resolvents and not resolvents[0]:  # empty resolvent, the sentence is refuted
+                self.time_for_preprocess = time() - start_time
+                self.release()
+                return None
+            removed = self.clause_of_var(var)
+            self.removed_clause.append((var, removed))
+            for clause in resolvents:
+                self.add_c(clause)
+            self.remove_c(var)
+            self.remove_c(-var)
+            touched = {abs(lit) for clause in removed for lit in clause}
+            touched.update(abs(lit) for clause in resolvents for lit in clause)
+            touched.discard(var)
+            touched -= self.frozen
+            for v in touched:
+                if not queued[v] and num_occ[v] and num_occ[-v]:
+                    heapq.heappush(heap, (num_occ[v] * num_occ[-v], v))
+                    queued[v] = True
+        self.time_for_preprocess = time() - start_time
+        sentence = self.valid_sentence()
+        self.release()
+        return sentence
+
+    def _resolvents(self, var):
+        """The non-tautological resolvents on var not already in the sentence, or None if they exceed the bounds.
+        A single empty resolvent is returned as soon as it is found."""
+        sentence = self.sentence
+        N_clauses = [sentence[idx] for idx in self.live_occurs(-var)]
+        P_clauses = [sentence[idx] for idx in self.live_occurs(var)]
+        limit = len(P_clauses) + len(N_clauses) + self.grow
+        resolvents, keys = [], set()
+        for P_clause in P_clauses:
+            for N_clause in N_clauses:
+                self.num_steps += 1
+                resolvent = self.learn_resolvent(P_clause, N_clause, var)
+                if resolvent is None:  # tautology
+                    continue
+                if not resolvent:
+                    return [resolvent]
+                if len(resolvent) > self.resolvent_limit:
+                    return None
+                key = tuple(resolvent)
+                if key not in keys and not self.judge_exist(key):
+                    keys.add(key)
+                    resolvents.append(resolvent)
+                    if len(resolvents) > limit:
+                        return None
+        return resolvents
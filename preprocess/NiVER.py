@@ -2,36 +2,55 @@ from time import time
 
 
 class NiVER:
-    """Preprocess based on Non Increasing VER (NiVER)"""
+    """Preprocess based on Non Increasing VER (NiVER)
+    Clauses are kept with their literals sorted by variable, so that resolvents are built by merging and a clause is
+    identified by the tuple of its literals. Deleted clauses are only flagged, and dropped from the occurrence lists
+    the next time those are visited. The `frozen` variables are never eliminated, since clauses added to the solver
+    later may still mention them. With a `tools.proof.DratProof`, the added resolvents and the removed clauses are
+    logged, the resolvents first since they are derived from the removed clauses."""
 
-    def __init__(self, sentence, num_vars, flag, ple=False):
-        self.sentence = sentence
+    def __init__(self, sentence, num_vars, flag, ple=False, frozen=(), proof=None):
+        self.sentence = self._normalize(sentence)
         self.num_vars = num_vars
-        self.l2c_all, self.num_lit, self.valid_clause_index = self._init_watch()
+        self.deleted = [False] * len(self.sentence)  # clause index -> whether the clause is removed
+        self.occurs, self.num_occ, self.num_lit, self.index = self._init_occurrence()
         self.removed_clause = []    # clauses removed during preprocessing
         self.flag = flag    # degree of preprocess
         self.ple = ple  # pure literal eliminate or not
+        self.frozen = set(frozen)
+        self.proof = proof
         self.time_for_preprocess = 0  # seconds used for preprocessing
 
     def preprocess(self):
-        """The main part for preprocess with NiVER algorithm."""
+        """The main part for preprocess with NiVER algorithm.
+        A variable is eliminated if the non-tautological resolvents not already in the sentence have no more literals
+        in total than the clauses they replace."""
         start_time = time()
         if self.ple:
             self.pure_literal_elimination()
+        num_occ, num_lit, sentence = self.num_occ, self.num_lit, self.sentence
         while True:
             entry = False
             for var in range(1, self.num_vars + 1):
-                if len(self.l2c_all[var]) == 0 or len(self.l2c_all[-var]) == 0:
+                if num_occ[var] == 0 or num_occ[-var] == 0 or var in self.frozen:
                     continue
-                R_clause_set = []
+                R_clause_set, R_keys = [], set()
                 new_num_lit = 0
-                old_num_lit = self.num_lit[var] + self.num_lit[-var]
-                for P_idx in self.l2c_all[var]:
-                    for N_idx in self.l2c_all[-var]:
-                        resolvent = self.learn_resolvent(P_idx, N_idx, var)
+                old_num_lit = num_lit[var] + num_lit[-var]
+                N_clauses = [sentence[idx] for idx in self.live_occurs(-var)]
+                for P_idx in self.live_occurs(var):
+                    P_clause = sentence[P_idx]
+                    for N_clause in N_clauses:
+                        resolvent = self.learn_resolvent(P_clause, N_clause, var)
+                        if resolvent is None:  # tautology
+                            continue
                         if len(resolvent) == 0:
+                            self.time_for_preprocess = time() - start_time
+                            self.release()
                             return None
-                        if not self.judge_tautology(resolvent) and not self.judge_exist(resolvent):
+                        key = tuple(resolvent)
+                        if key not in R_keys and not self.judge_exist(key):
+                            R_keys.add(key)
                             new_num_lit += len(resolvent)
                             R_clause_set.append(resolvent)
                             if new_num_lit > old_num_lit:
@@ -41,16 +60,10 @@ class NiVER:
 
                 if old_num_lit >= new_num_lit:
                     self.removed_clause.append((var, self.clause_of_var(var)))
+                    for clause in R_clause_set:
+                        self.add_c(clause)
                     self.remove_c(var)
                     self.remove_c(-var)
-                    current_idx = len(self.sentence)
-                    for clause in R_clause_set:
-                        self.valid_clause_index.add(current_idx)
-                        self.sentence.append(clause)
-                        for lit in clause:
-                            self.l2c_all[lit].append(current_idx)
-                            self.num_lit[lit] += len(clause)
-                        current_idx += 1
                     if self.flag:
                         entry = True
             if not entry:
@@ -58,110 +71,160 @@ class NiVER:
         if self.ple:
             self.pure_literal_elimination()
         self.time_for_preprocess = time() - start_time
-        return self.valid_sentence()
+        sentence = self.valid_sentence()
+        self.release()
+        return sentence
 
     def pure_literal_elimination(self):
         """Eliminate pure literals."""
         for var in range(1, self.num_vars + 1):
-            if len(self.l2c_all[var]) == 0 and len(self.l2c_all[-var]) != 0:
+            if var in self.frozen:
+                continue
+            if self.num_occ[var] == 0 and self.num_occ[-var] != 0:
                 self.removed_clause.append((var, self.clause_of_var(var)))
                 self.remove_c(-var)
-            if len(self.l2c_all[-var]) == 0 and len(self.l2c_all[var]) != 0:
+            if self.num_occ[-var] == 0 and self.num_occ[var] != 0:
                 self.removed_clause.append((var, self.clause_of_var(var)))
                 self.remove_c(var)
 
-    def _init_watch(self):
-        """Initialize the l2c_all, num_lit and valid_clause_index."""
-        l2c_all = {}    # literal -> clause
-        num_lit = []    # literal -> number of literals
-        valid_index = set()     # indexes of valid clauses
-        for i in range(-self.num_vars, self.num_vars + 1):
-            l2c_all[i] = []
-            num_lit.append(0)
+    @staticmethod
+    def _normalize(sentence):
+        """Sort the literals of every clause by variable and drop duplicate literals and tautologies."""
+        normalized = []
+        for clause in sentence:
+            clause = sorted(set(clause), key=abs)
+            if all(abs(clause[i]) != abs(clause[i + 1]) for i in range(len(clause) - 1)):
+                normalized.append(clause)
+        return normalized
+
+    def _init_occurrence(self):
+        """Initialize the occurrence lists, and the number of clauses and literals of the clauses containing every
+        literal. Lists indexed by literal wrap negative literals around to the back half.
+        `index` counts the clauses of the sentence by their tuple of literals."""
+        size = 2 * self.num_vars + 1
+        occurs = [[] for _ in range(size)]  # literal -> indexes of the clauses containing it
+        num_occ = [0] * size    # literal -> number of clauses containing it
+        num_lit = [0] * size    # literal -> number of literals
+        index = {}
         for idx, clause in enumerate(self.sentence):
-            valid_index.add(idx)
             for lit in clause:
-                l2c_all[lit].append(idx)
+                occurs[lit].append(idx)
+                num_occ[lit] += 1
                 num_lit[lit] += len(clause)
-        return l2c_all, num_lit, valid_index
-
-    def learn_resolvent(self, P_idx, N_idx, var):
-        """Eliminate the Variable numbered var, and return the resolvent."""
-        P_clause = list(self.sentence[P_idx])
-        N_clause = list(self.sentence[N_idx])
-        P_clause.remove(var)
-        N_clause.remove(-var)
-        resolvent = list(set(P_clause + N_clause))
-        return resolvent
+            key = tuple(clause)
+            index[key] = index.get(key, 0) + 1
+        return occurs, num_occ, num_lit, index
 
-    def judge_tautology(self, clause):
-        """Determine whether a clause is a tautology."""
-        for lit in clause:
-            if -lit in clause:
-                return True
-        return False
+    def live_occurs(self, lit):
+        """The indexes of the clauses containing lit, after dropping the deleted ones from its occurrence list."""
+        deleted = self.deleted
+        occurs = self.occurs[lit] = [idx for idx in self.occurs[lit] if not deleted[idx]]
+        return occurs
 
-    def judge_exist(self, clause):
-        """Determine whether a clause has already existed in sentence."""
-        existed_clause = []
-        for lit in clause:
-            for c_idx in self.l2c_all[lit]:
-                c = set(self.sentence[c_idx])
-                existed_clause.append(c)
-        if set(clause) in existed_clause:
-            return True
-        else:
-            return False
+    @staticmethod
+    def learn_resolvent(P_clause, N_clause, var):
+        """Merge two clauses sorted by variable into their resolvent on the variable numbered var.
+        Return None if the resolvent is a tautology."""
+        resolvent = []
+        i, j, len_p, len_n = 0, 0, len(P_clause), len(N_clause)
+        while i < len_p and j < len_n:
+            p, n = P_clause[i], N_clause[j]
+            var_p, var_n = abs(p), abs(n)
+            if var_p < var_n:
+                resolvent.append(p)
+                i += 1
+            elif var_n < var_p:
+                resolvent.append(n)
+                j += 1
+            else:
+                if var_p != var:
+                    if p != n:
+                        return None
+                    resolvent.append(p)
+                i += 1
+                j += 1
+        resolvent.extend(P_clause[i:])
+        resolvent.extend(N_clause[j:])
+        return resolvent
+
+    def judge_exist(self, key):
+        """Determine whether a clause, given as the tuple of its sorted literals, has already existed in sentence."""
+        return key in self.index
 
     def clause_of_var(self, var):
         """Return the list of the clauses that will be eliminated."""
-        clause_list = []
-        for c_idx in self.l2c_all[var]:
-            clause_list.append(self.sentence[c_idx])
-        for c_idx in self.l2c_all[-var]:
-            clause_list.append(self.sentence[c_idx])
-        return clause_list
+        sentence = self.sentence
+        return [sentence[idx] for idx in self.live_occurs(var)] + [sentence[idx] for idx in self.live_occurs(-var)]
+
+    def add_c(self, clause):
+        """Add a clause sorted by variable to the sentence."""
+        if self.proof is not None:
+            self.proof.add(clause)
+        idx = len(self.sentence)
+        self.sentence.append(clause)
+        self.deleted.append(False)
+        for lit in clause:
+            self.occurs[lit].append(idx)
+            self.num_occ[lit] += 1
+            self.num_lit[lit] += len(clause)
+        key = tuple(clause)
+        self.index[key] = self.index.get(key, 0) + 1
 
     def remove_c(self, var):
         """Remove clauses including literal var from sentence."""
-        tmp_idx_set = set(self.l2c_all[var])
-        for c_idx in tmp_idx_set:
-            self.valid_clause_index.remove(c_idx)
+        num_occ, num_lit, index = self.num_occ, self.num_lit, self.index
+        for c_idx in self.live_occurs(var):
+            self.deleted[c_idx] = True
             clause = self.sentence[c_idx]
+            if self.proof is not None:
+                self.proof.delete(clause)
             for lit in clause:
-                self.l2c_all[lit].remove(c_idx)
-                self.num_lit[lit] -= len(clause)
+                num_occ[lit] -= 1
+                num_lit[lit] -= len(clause)
+            key = tuple(clause)
+            index[key] -= 1
+            if index[key] == 0:
+                del index[key]
+        self.occurs[var] = []
 
     def valid_sentence(self):
         """Return the valid sentence."""
-        final_sentence = []
-        for idx in self.valid_clause_index:
-            final_sentence.append(self.sentence[idx])
-        return final_sentence
+        deleted = self.deleted
+        return [clause for idx, clause in enumerate(self.sentence) if not deleted[idx]]
+
+    def release(self):
+        """Drop the clauses and the occurrence lists once the sentence is preprocessed: the solver keeps the
+        preprocessor for after_assignment(...), which only needs `removed_clause`."""
+        self.sentence = self.deleted = self.occurs = self.num_occ = self.num_lit = self.index = None
 
     def after_assignment(self, result):
         """Assign values to elements eliminated during preprocessing after assignment."""
-        if result is None: return None
-        res = set(result)
-        for i in range(1, self.num_vars+1):
-            if i not in res and -i not in res:
-                res.add(i)
-
-        while len(self.removed_clause) != 0:
-            lit, clause_list = self.removed_clause.pop()
-            for clause in clause_list:
-                flag = True
+        return reconstruct(result, self.num_vars, self.removed_clause)
+
+
+def reconstruct(result, num_vars, removed_clause):
+    """Extend an assignment of the preprocessed sentence to the eliminated variables, by going back through the stack of
+    `(var, removed clauses)` and flipping `var` whenever one of its clauses is not satisfied."""
+    if result is None: return None
+    res = set(result)
+    for i in range(1, num_vars+1):
+        if i not in res and -i not in res:
+            res.add(i)
+
+    for lit, clause_list in reversed(removed_clause):  # the stack is kept, later solves reconstruct from it again
+        for clause in clause_list:
+            flag = True
+            for l in clause:
+                if abs(l) != abs(lit) and l in res:
+                    flag = False
+                    break
+            if flag:
                 for l in clause:
-                    if abs(l) != abs(lit) and l in res:
-                        flag = False
+                    if abs(l) == abs(lit):
+                        if lit in res:
+                            res.remove(lit)
+                        elif -lit in res:
+                            res.remove(-lit)
+                        res.add(l)
                         break
-                if flag:
-                    for l in clause:
-                        if abs(l) == abs(lit):
-                            if lit in res:
-                                res.remove(lit)
-                            elif -lit in res:
-                                res.remove(-lit)
-                            res.add(l)
-                            break
-        return list(res)
\ No newline at end of file
+    return list(res)
\ No newline at end of file
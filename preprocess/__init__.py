@@ -1,20 +1,66 @@
+import inspect
+
 from .NiVER import NiVER
+from .BVE import BVE
+from .subsumption import Subsumption
+from .cached import Preprocessed
 
 
 __all__ = {
-    "init_preprocess_policy"
+    "init_preprocess_policy",
+    "preprocess_key",
+    "Preprocessed",
+    "Subsumption"
+}
+
+# version of the preprocessing code, part of the key of the cached formulas: increase it with every change that may
+# change what a policy computes
+PREPROCESS_VERSION = 1
+
+# policy -> preprocessor and its arguments besides the sentence, the number of variables, `frozen` and `proof`
+POLICIES = {
+    'niver': (NiVER, {'flag': True}),
+    'lighter-niver': (NiVER, {'flag': False}),
+    'li-niver-withple': (NiVER, {'flag': False, 'ple': True}),
+    'bve': (BVE, {}),
 }
 
 
-def init_preprocess_policy(preprocess_policy, sentence, num_vars):
-    """Preprocess."""
+def init_preprocess_policy(preprocess_policy, sentence, num_vars, frozen=(), proof=None):
+    """Preprocess. 'subsume+<policy>' runs subsumption before another policy. The `frozen` variables are kept, and
+    the steps are logged to the DRAT `proof` if given."""
     if preprocess_policy is None or preprocess_policy.lower() == "none":
         return None
-    elif preprocess_policy.lower() == 'niver':
-        return NiVER(sentence, num_vars, True)
-    elif preprocess_policy.lower() == 'lighter-niver':
-        return NiVER(sentence, num_vars, False)
-    elif preprocess_policy.lower() == 'li-niver-withple':
-        return NiVER(sentence, num_vars, False, True)
+    elif preprocess_policy.lower().split('+')[0] == 'subsume':
+        return Subsumption(sentence, num_vars, preprocess_policy.partition('+')[2] or None, frozen=frozen,
+                           proof=proof)
+    elif preprocess_policy.lower() in POLICIES:
+        preprocessor, arguments = POLICIES[preprocess_policy.lower()]
+        return preprocessor(sentence, num_vars, frozen=frozen, proof=proof, **arguments)
     else:
         raise ValueError('Unknown preprocess policy: {}'.format(preprocess_policy))
+
+
+def preprocess_key(preprocess_policy):
+    """What a preprocess policy computes, for the formula cache: the version of the preprocessing code and the
+    preprocessors of the policy with all their parameters, the defaults included."""
+    return f"v{PREPROCESS_VERSION} {_describe(preprocess_policy)}"
+
+
+def _describe(preprocess_policy):
+    if preprocess_policy is None or preprocess_policy.lower() == "none":
+        return "none"
+    elif preprocess_policy.lower().split('+')[0] == 'subsume':
+        return f"{_signature(Subsumption, {})} + {_describe(preprocess_policy.partition('+')[2] or None)}"
+    elif preprocess_policy.lower() in POLICIES:
+        return _signature(*POLICIES[preprocess_policy.lower()])
+    else:
+        raise ValueError('Unknown preprocess policy: {}'.format(preprocess_policy))
+
+
+def _signature(preprocessor, arguments):
+    """The preprocessor with its parameters: the defaults of its constructor, overridden by `arguments`."""
+    parameters = {name: parameter.default for name, parameter in inspect.signature(preprocessor).parameters.items()
+                  if parameter.default is not parameter.empty and name not in ('then', 'frozen', 'proof')}
+    parameters.update(arguments)
+    return f"{preprocessor.__name__}({', '.join(f'{name}={value!r}' for name, value in sorted(parameters.items()))})"
@@ -0,0 +1,20 @@
+from .NiVER import reconstruct
+
+
+class Preprocessed:
+    """A preprocessing result restored from the formula cache: the simplified sentence (None if it was refuted) and the
+    stack of eliminated variables with their removed clauses, used to extend the assignment after solving."""
+
+    def __init__(self, sentence, num_vars, removed_clause, time_for_preprocess=0):
+        self.sentence = sentence
+        self.num_vars = num_vars
+        self.removed_clause = removed_clause
+        self.time_for_preprocess = time_for_preprocess  # seconds used for loading
+
+    def preprocess(self):
+        """The preprocessing has been done, return the simplified sentence."""
+        return self.sentence
+
+    def after_assignment(self, result):
+        """Assign values to elements eliminated during preprocessing after assignment."""
+        return reconstruct(result, self.num_vars, self.removed_clause)
@@ -0,0 +1,98 @@
+"""
+equivalence.py
+equivalent literal substitution: literals in the same strongly connected component of the binary implication graph
+imply each other, so all of them can be replaced by one representative.
+"""
+
+
+def find_equivalences(sentence, num_vars, frozen=()):
+    """Find the strongly connected components of the binary implication graph with Tarjan's algorithm.
+    Every binary clause (a b) gives the implications -a -> b and -b -> a.
+    Return a dict mapping each substituted variable to the literal equivalent to it, whose variable is the smallest of
+    its component, or None if a literal is equivalent to its negation (the sentence is unsatisfiable).
+    The `frozen` variables are never substituted, and represent their component if they are in one."""
+    size = 2 * num_vars + 1
+    edges = [[] for _ in range(size)]  # literal -> literals implied by it, negative literals wrap around
+    for clause in sentence:
+        if len(clause) == 2:
+            a, b = clause
+            edges[-a].append(b)
+            edges[-b].append(a)
+    order = [0] * size  # literal -> 1 + its visiting order, 0 if not visited yet
+    low = [0] * size
+    on_stack = [False] * size
+    stack, equivalences, counter = [], {}, 0
+    for root in range(-num_vars, num_vars + 1):
+        if root == 0 or order[root] or not edges[root]:
+            continue
+        counter += 1
+        order[root] = low[root] = counter
+        stack.append(root)
+        on_stack[root] = True
+        work = [(root, 0)]  # iterative depth-first search: (literal, index of its next edge)
+        while work:
+            lit, i = work[-1]
+            if i < len(edges[lit]):
+                work[-1] = (lit, i + 1)
+                succ = edges[lit][i]
+                if not order[succ]:
+                    counter += 1
+                    order[succ] = low[succ] = counter
+                    stack.append(succ)
+                    on_stack[succ] = True
+                    work.append((succ, 0))
+                elif on_stack[succ]:
+                    low[lit] = min(low[lit], order[succ])
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[lit])
+            if low[lit] != order[lit]:
+                continue
+            component = []
+            while True:  # pop the component rooted at lit
+                member = stack.pop()
+                on_stack[member] = False
+                component.append(member)
+                if member == lit:
+                    break
+            if len(component) == 1:
+                continue
+            representative = min(component, key=lambda member: (abs(member) not in frozen, abs(member)))
+            for member in component:
+                if member == -representative:
+                    return None
+                if member != representative and abs(member) not in frozen:
+                    equivalences[abs(member)] = representative if member > 0 else -representative
+    return equivalences
+
+
+def substitute(sentence, equivalences):
+    """Replace every substituted variable by its equivalent literal, and drop duplicate literals and tautologies."""
+    substituted = []
+    for clause in sentence:
+        if not any(abs(lit) in equivalences for lit in clause):
+            substituted.append(clause)
+            continue
+        literals = set()
+        for lit in clause:
+            equivalent = equivalences.get(abs(lit))
+            literals.add(lit if equivalent is None else equivalent if lit > 0 else -equivalent)
+        if not any(-lit in literals for lit in literals):
+            substituted.append(list(literals))
+    return substituted
+
+
+def reconstruct_equivalences(result, equivalences):
+    """Assign every substituted variable the value of its equivalent literal."""
+    if result is None or not equivalences:
+        return result
+    res = set(result)
+    for var, equivalent in equivalences.items():
+        res.discard(var)
+        res.discard(-var)
+        if -equivalent not in res:
+            res.add(equivalent)  # the representative may be unassigned if all its clauses were dropped
+        res.add(var if equivalent in res else -var)
+    return list(res)
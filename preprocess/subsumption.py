@@ -0,0 +1,140 @@
+from time import time
+
+from .NiVER import NiVER
+
+
+class Subsumption(NiVER):
+    """Preprocess by backward subsumption and self-subsuming strengthening.
+    Every clause C is checked against the clauses containing the literal of C with the fewest occurrences (of either
+    polarity): a clause D containing C is removed, and a clause D containing C but with one literal flipped loses that
+    literal. 64-bit signatures of the variables of the clauses filter out most candidates before the literals are
+    compared. Strengthened clauses are checked again. Both simplifications keep the sentence equivalent, so no
+    reconstruction is needed; `then` names a preprocess policy to run afterwards, e.g. 'NiVER'."""
+
+    def __init__(self, sentence, num_vars, then=None, step_limit=10000000, frozen=(), proof=None):
+        super().__init__(sentence, num_vars, False, frozen=frozen, proof=proof)
+        self.then = then
+        self.next = None  # the preprocessor of the policy `then`
+        self.step_limit = step_limit
+        self.num_steps = 0  # candidate clauses compared
+        self.num_subsumed, self.num_strengthened, self.num_removed_literals = 0, 0, 0
+        self.time_for_subsumption = 0
+
+    def preprocess(self):
+        """Simplify the sentence, then run the preprocess policy `then` on it."""
+        start_time = time()
+        sentence = self._simplify()
+        self.release()
+        self.time_for_subsumption = time() - start_time
+        if sentence is not None and self.then is not None:
+            from . import init_preprocess_policy
+            self.next = init_preprocess_policy(self.then, sentence, self.num_vars, self.frozen, self.proof)
+            if self.next is not None:
+                sentence = self.next.preprocess()
+                self.removed_clause = self.next.removed_clause  # reconstructed by after_assignment
+        self.time_for_preprocess = time() - start_time
+        return sentence
+
+    def _simplify(self):
+        """Run subsumption and strengthening until no clause is left to check, return None if the sentence is refuted."""
+        sentence, deleted, num_occ = self.sentence, self.deleted, self.num_occ
+        self.signatures = [self._signature(clause) for clause in sentence]
+        queue = sorted(range(len(sentence)), key=lambda idx: len(sentence[idx]), reverse=True)
+        queued = [True] * len(sentence)
+        while queue and self.num_steps <= self.step_limit:
+            idx = queue.pop()  # the shortest clauses first, they subsume the most
+            queued[idx] = False
+            if deleted[idx]:
+                continue
+            clause = sentence[idx]
+            if not clause:
+                return None
+            pivot = min(clause, key=lambda lit: num_occ[lit] + num_occ[-lit])
+            for lit in (pivot, -pivot):
+                for other in list(self.live_occurs(lit)):
+                    if other == idx or deleted[other]:
+                        continue
+                    flipped = self._subsumes(idx, other)
+                    if flipped is None:
+                        continue
+                    if flipped == 0:
+                        self.num_subsumed += 1
+                        self.num_removed_literals += len(sentence[other])
+                        self._delete(other)
+                        continue
+                    self.num_strengthened += 1
+                    self.num_removed_literals += 1
+                    self._strengthen(other, flipped)
+                    if not sentence[other]:
+                        return None
+                    if not queued[other]:
+                        queue.append(other)
+                        queued[other] = True
+        return self.valid_sentence()
+
+    def _subsumes(self, idx, other):
+        """Compare clause idx with a longer or equal clause other, both sorted by variable.
+        Return 0 if idx subsumes other, the literal of other to remove if idx strengthens other, None otherwise."""
+        self.num_steps += 1
+        clause, target = self.sentence[idx], self.sentence[other]
+        if len(clause) > len(target) or self.signatures[idx] & ~self.signatures[other]:
+            return None
+        flipped, j, n = 0, 0, len(target)
+        for lit in clause:
+            var = abs(lit)
+            while j < n and abs(target[j]) < var:
+                j += 1
+            if j == n or abs(target[j]) != var:
+                return None
+            if target[j] != lit:
+                if flipped:
+                    return None
+                flipped = target[j]
+            j += 1
+        return flipped
+
+    def _delete(self, idx):
+        """Remove a clause from sentence."""
+        clause = self.sentence[idx]
+        if self.proof is not None:
+            self.proof.delete(clause)
+        self.deleted[idx] = True
+        for lit in clause:
+            self.num_occ[lit] -= 1
+            self.num_lit[lit] -= len(clause)
+        self._unindex(clause)
+
+    def _strengthen(self, idx, lit):
+        """Remove a literal from a clause."""
+        clause = self.sentence[idx]
+        if self.proof is not None:  # the strengthened clause is the resolvent of the clause and the subsuming one
+            self.proof.add([l for l in clause if l != lit])
+            self.proof.delete(clause)
+        self._unindex(clause)
+        for l in clause:
+            self.num_lit[l] -= 1
+        self.num_lit[lit] -= len(clause) - 1
+        self.num_occ[lit] -= 1
+        self.occurs[lit].remove(idx)
+        clause.remove(lit)
+        key = tuple(clause)
+        self.index[key] = self.index.get(key, 0) + 1
+        self.signatures[idx] = self._signature(clause)
+
+    def release(self):
+        super().release()
+        self.signatures = None
+
+    def _unindex(self, clause):
+        key = tuple(clause)
+        self.index[key] -= 1
+        if self.index[key] == 0:
+            del self.index[key]
+
+    @staticmethod
+    def _signature(clause):
+        """64-bit signature of the variables of a clause."""
+        signature = 0
+        for lit in clause:
+            signature |= 1 << (abs(lit) & 63)
+        return signature
@@ -0,0 +1,62 @@
+from arena import FLAGS, USED
+
+
+class LBD:
+    """Learned clause database reduction based on the literal block distance (LBD) and activity of learned clauses.
+    Learned clauses are kept in three tiers by their LBD:
+    - core: LBD <= core_lbd ("glue" clauses), kept permanently;
+    - tier2: LBD <= tier2_lbd, kept as long as they take part in a conflict between two reductions;
+    - local: all the others.
+    Every reduction deletes the worse half of the candidates (local clauses and unused tier2 clauses that are not the
+    reason of a current assignment), the ones with higher LBD and then lower activity first.
+    The LBD, activity and used flag of a learned clause are kept in its header in the clause arena."""
+
+    def __init__(self, schedule=(2000, 300), tiers=(2, 6), decay=0.999):
+        """:param schedule: (first, inc), reduce after `first` conflicts, then increase the interval by `inc` after
+        each reduction
+        :param tiers: (core_lbd, tier2_lbd)"""
+        self.interval, self.inc_interval = schedule
+        self.next_reduce = self.interval
+        self.core_lbd, self.tier2_lbd = tiers
+        self.decay = decay
+        self.conflicts = 0
+        self.inc = 1.0
+        self.num_reductions, self.num_deleted = 0, 0
+
+    def after_learn(self, arena, cref):
+        """Called after a learned clause is added to the database, it starts as used with the current increment."""
+        arena.bump(cref, self.inc)
+
+    def after_conflict(self, arena):
+        """Called after a conflict is analyzed, decay the activities of all learned clauses."""
+        self.conflicts += 1
+        self.inc /= self.decay
+        if self.inc > 1e20:
+            for cref in arena.crefs(learnt=True):
+                arena.set_activity(cref, arena.activity(cref) * 1e-20)
+            self.inc *= 1e-20
+
+    def bump(self, arena, cref):
+        """Called when a learned clause takes part in a conflict analysis."""
+        arena.bump(cref, self.inc)
+
+    def need_reduce(self):
+        return self.conflicts >= self.next_reduce
+
+    def reduce(self, arena, locked):
+        """Choose learned clauses to delete, and clear the used flag of all of them.
+        :param locked: references of learned clauses that are reasons of current assignments
+        :return: the set of references of the clauses to delete"""
+        self.interval += self.inc_interval
+        self.next_reduce = self.conflicts + self.interval
+        self.num_reductions += 1
+        mem, candidates = arena.mem, []
+        for cref in arena.crefs(learnt=True):
+            lbd = arena.lbd(cref)
+            if lbd > self.core_lbd and cref not in locked and not (lbd <= self.tier2_lbd and mem[cref + FLAGS] & USED):
+                candidates.append(cref)
+            mem[cref + FLAGS] &= ~USED
+        candidates.sort(key=lambda cref: (-arena.lbd(cref), arena.activity(cref)))
+        deleted = set(candidates[:len(candidates) // 2])
+        self.num_deleted += len(deleted)
+        return deleted
@@ -0,0 +1,16 @@
+from .LBD import LBD
+
+
+__all__ = {
+    "init_reduce_policy",
+}
+
+
+def init_reduce_policy(reduce_policy, schedule, tiers):
+    """Initialize the learned clause database reduction policy."""
+    if reduce_policy is None or reduce_policy == "None":
+        return None
+    elif reduce_policy.lower() == 'lbd':
+        return LBD(schedule, tiers)
+    else:
+        raise ValueError('Unknown reduce policy: {}'.format(reduce_policy))
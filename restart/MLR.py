@@ -18,7 +18,7 @@ class MLR:
         """
         self.conflicts += 1
         self.conflicts_since_last_restart += 1
-        next_lbd = self._lbd(learnt_clause_literals, assign_info)
+        next_lbd = assign_info.lbd(learnt_clause_literals)
         δ = next_lbd - self.μ
         self.μ += δ / self.conflicts
         Δ = next_lbd - self.μ
@@ -48,15 +48,6 @@ class MLR:
                 need_restart = True
         return need_restart
 
-    def _lbd(self, clause, assign_info):
-        """Calculate the LBD of a clause"""
-        mi, ma = float("inf"), 0
-        for lit in clause:
-            level = assign_info.level(-lit)
-            mi = min(mi, level)
-            ma = max(ma, level)
-        return ma - mi + 1
-
     def _feature_vec(self):
         return np.array([1, self.prev_lbd1, self.prev_lbd2, self.prev_lbd3,
                          self.prev_lbd1 * self.prev_lbd2, self.prev_lbd1 * self.prev_lbd3,
@@ -1,9 +1,28 @@
-import os
+"""
+test.py
+benchmark the solver on the instance x configuration matrix. Every run is a process of its own with a hard wall-clock
+and memory limit, up to one per core at a time. The results are written as JSON and CSV, scored by PAR-2 and number
+of solved instances per configuration, and compared with a baseline (the JSON results of an earlier benchmark).
+"""
+import argparse
 import csv
-from func_timeout import func_set_timeout
+import json
+import multiprocessing
+import os
+import queue
+import sys
+from collections import Counter, namedtuple
+from time import time
 
 from CDCL import CDCL
-from tools.utils import read_cnf
+from tools.budget import peak_memory_mb
+from tools.profiler import Profiler
+from tools.utils import CNF_EXTENSIONS, open_cnf, read_cnf, verify_file
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
 
 # some other parameters:
 Paras = {'discount': 0.95, 'alpha': 0.4, 'batch': 10}
@@ -16,93 +35,265 @@ RestartPolicy = ["MLR", "None"]
 PreProcessor = ["lighter-NiVER", "None"]
 Bandit = ["UCB", "None"]
 
+Config = namedtuple("Config", "preprocess restart bandit heuristic")
 
-def testTime():
-    # get all test files
-    # assume the test files are all in ./examples
-    current_path = os.getcwd()
-    file_path = current_path + "\\examples"
-    TestFilenames = os.listdir(file_path)
-
-    # save the result in a csv file
-    r = open('results/timeTestResult.csv', 'w', newline="")
-    csv_writer = csv.writer(r)
-    csv_writer.writerow(["FileName",
-                         "PreProcessor",
-                         "RestartPolicy",
-                         "Bandit",
-                         "AssignmentAlgorithm",
-                         "hasSolution",
-                         "Time",
-                         "PreprocessTime"])
-
-    for testfile in TestFilenames:
-        if not testfile.endswith("cnf"):
-            continue
-        for preprocess_policy in PreProcessor:
-            for restart_policy in RestartPolicy:
-                for bandit in Bandit:
-                    if bandit != "None" and restart_policy == "None":
-                        continue
-                    if bandit != "None":
-                        try:
-                            Res = run_cdcl(testfile, preprocess_policy, restart_policy, bandit, "VSIDS")
-                        except:
-                            csv_writer.writerow(["TIMEOUT", testfile, preprocess_policy, restart_policy, bandit])
-                            continue
-                        Res[4] = '/'
-                        csv_writer.writerow(Res)
-                    else:
-                        for assignment_algorithm in AssignmentAlgorithm:
-                            try:
-                                Res = run_cdcl(testfile, preprocess_policy, restart_policy, bandit, assignment_algorithm)
-                            except:
-                                csv_writer.writerow(["TIMEOUT", testfile, preprocess_policy, restart_policy, bandit])
-                                continue
-                            csv_writer.writerow(Res)
-
-    r.close()
-
-
-# def handle_timeout(signum, frame):
-#     raise TimeoutError("function timeout")
-
-# timeout_sec = 2
-# signal.signal(signal.SIGALRM, handle_timeout)
-
-@func_set_timeout(200)
-def run_cdcl(testfile, preprocess_policy, restart_policy, bandit, assignment_algorithm):
-    print(testfile, preprocess_policy, restart_policy, bandit, assignment_algorithm)
-    hasSolution = True
-    with open("examples/" + testfile, "r") as f:
-        sentence, num_vars = read_cnf(f)
-
-    # Create CDCL solver and solve it!
+CSV_HEADER = ["FileName", "PreProcessor", "RestartPolicy", "Bandit", "AssignmentAlgorithm", "Status", "Time",
+              "PreprocessTime", "Decisions", "Propagations", "Conflicts", "Restarts", "LearnedClauses", "PeakMemoryMB"]
+SOLVED = ("SAT", "UNSAT")
+POLL_INTERVAL = 0.05  # seconds between two checks of the time limit
+
+
+def configurations():
+    """The configurations of the matrix, a bandit switches between all the heuristics and needs restarts."""
+    configs = []
+    for preprocess_policy in PreProcessor:
+        for restart_policy in RestartPolicy:
+            for bandit in Bandit:
+                if bandit != "None" and restart_policy == "None":
+                    continue
+                if bandit != "None":
+                    configs.append(Config(preprocess_policy, restart_policy, bandit, "/"))
+                else:
+                    configs.extend(Config(preprocess_policy, restart_policy, bandit, assignment_algorithm)
+                                   for assignment_algorithm in AssignmentAlgorithm)
+    return configs
+
+
+def label(config):
+    return " ".join(config)
+
+
+def find_instances(paths):
+    """The CNF files of the paths, directories are listed (not recursively)."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith(CNF_EXTENSIONS))
+        else:
+            files.append(path)
+    return files
+
+
+def run_cdcl(formula, testfile, config, key, results, memory=None, profile=False):
+    """Solve one instance, parsed as `formula` = `(sentence, num_vars)`, with one configuration and put
+    `(key, record)` on the results queue. The address space of the process is limited to `memory` megabytes, so that
+    an allocation beyond it raises MemoryError (MEMOUT)."""
+    start_time = time()
+    if memory and resource is not None:
+        hard = resource.getrlimit(resource.RLIMIT_AS)[1]
+        soft = memory << 20 if hard == resource.RLIM_INFINITY else min(memory << 20, hard)
+        resource.setrlimit(resource.RLIMIT_AS, (soft, hard))
+    try:
+        record = solve_instance(*formula, testfile, config, profile)
+    except MemoryError:
+        record = {"status": "MEMOUT", "time": time() - start_time}
+    except Exception as e:
+        record = {"status": f"error: {e!r}", "time": time() - start_time}
+    else:
+        record["time"] = time() - start_time
+    record["peak_memory_mb"] = round(peak_memory_mb(), 1)
+    results.put((key, record))
+
+
+def solve_instance(sentence, num_vars, testfile, config, profile=False):
+    """Solve one instance with one configuration, preprocessing included, return its record."""
     cdcl = CDCL(sentence, num_vars,
-                assignment_algorithm,
+                "VSIDS" if config.heuristic == "/" else config.heuristic,
                 Paras['alpha'],
                 Paras['discount'],
                 Paras['batch'],
-                restart_policy,
-                bandit,
-                preprocess_policy)
-    # signal.alarm(timeout_sec)
-    # try:
-    res, preprocess_time, solve_time = cdcl.solve()
-    # except TimeoutError:
-        # -1 means find no solution within `timeout_sec` seconds
-    # Res = [testfile, preprocess_policy, restart_policy, bandit, assignment_algorithm, False, -1, preprocess_time]
-    # return Res
-    # finally:
-        # signal.alarm(0)
-
+                config.restart,
+                config.bandit,
+                config.preprocess,
+                "LBD")
+    del sentence  # the solver holds the formula (or its preprocessed copy)
+    profiler = Profiler() if profile else None
+    if profiler is not None:
+        profiler.attach(cdcl)
+    res, preprocess_time, solve_time, stats = cdcl.solve()
     if res is None:
-        print("NO SOLUTION")
-        hasSolution = False
+        status = "UNSAT"
+    else:
+        with open_cnf(testfile) as f:
+            status = "SAT" if verify_file(f, res) is None else "WRONG"
+    record = {"status": status, "preprocess_time": preprocess_time, "solve_time": solve_time,
+              "decisions": stats.decisions, "propagations": stats.propagations, "conflicts": stats.conflicts,
+              "restarts": stats.restarts, "learned": cdcl.num_learned(), "stats": stats.as_dict()}
+    if profiler is not None:
+        record["profile"] = profiler.as_dict()
+    return record
+
+
+def benchmark(files, configs, jobs=None, timeout=200, memory=None, profile=False):
+    """Run every configuration on every file, at most `jobs` processes at a time (one per core by default).
+    A run is killed after `timeout` seconds (TIMEOUT) and runs out of memory (MEMOUT) when its address space would
+    exceed `memory` megabytes, which is enforced where the `resource` module is available. Every run that reports
+    records its peak resident memory. With `profile`, the records hold the time spent in every phase of the solver.
+    Every file is parsed once, before its runs are started, and each run preprocesses it again under its own timer:
+    the time of a run does not include the parsing. Return the list of run records."""
+    jobs = jobs or os.cpu_count() or 1
+    method = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+    context = multiprocessing.get_context(method)
+    results = context.Queue()
+    runs = [(testfile, config) for testfile in files for config in configs]
+    records = [{"file": os.path.basename(testfile), "config": config._asdict()} for testfile, config in runs]
+    waiting, running = list(range(len(runs))), {}  # key -> (process, start time)
+    formulas, remaining = {}, Counter(testfile for testfile, _ in runs)  # a formula is dropped once its runs started
+
+    def report(key, record):
+        records[key].update(record)
+        print(f"{records[key]['file']} {label(runs[key][1])}: {records[key]['status']} "
+              f"{records[key]['time']:.3f}s", flush=True)
+
+    def finish(key, record):
+        process, start_time = running.pop(key)
+        process.join(1)
+        report(key, record)
+
+    while waiting or running:
+        while waiting and len(running) < jobs:
+            key = waiting.pop(0)
+            testfile = runs[key][0]
+            try:
+                if testfile not in formulas:
+                    with open_cnf(testfile) as f:
+                        formulas[testfile] = read_cnf(f)
+                formula = formulas[testfile]
+            except Exception as e:  # every run of the file fails alike
+                report(key, {"status": f"error: {e!r}", "time": 0})
+                continue
+            finally:
+                remaining[testfile] -= 1
+                if not remaining[testfile]:
+                    formulas.pop(testfile, None)
+            process = context.Process(target=run_cdcl, args=(formula, *runs[key], key, results, memory, profile),
+                                      daemon=True)
+            process.start()
+            running[key] = (process, time())
+        try:
+            key, record = results.get(timeout=POLL_INTERVAL)
+            if key in running:  # not killed meanwhile
+                finish(key, record)
+        except queue.Empty:
+            pass
+        now = time()
+        for key, (process, start_time) in list(running.items()):
+            if now - start_time > timeout:
+                process.kill()
+                finish(key, {"status": "TIMEOUT", "time": timeout})
+            elif not process.is_alive() and process.exitcode != 0:  # a run that reported exits with 0
+                finish(key, {"status": f"crashed (exit code {process.exitcode})", "time": now - start_time})
+    return records
+
+
+def summarize(records, timeout):
+    """Number of solved instances and PAR-2 score (the time of the solved runs, twice the timeout for the others,
+    summed) of every configuration."""
+    summary = {}
+    for record in records:
+        entry = summary.setdefault(label(Config(**record["config"])), {"runs": 0, "solved": 0, "par2": 0.0})
+        solved = record["status"] in SOLVED
+        entry["runs"] += 1
+        entry["solved"] += solved
+        entry["par2"] += record["time"] if solved else 2 * timeout
+    return summary
+
+
+def compare(result, baseline, threshold=1.25, min_time=0.5):
+    """Regressions of the result with respect to the baseline: wrong or lost answers, runs and PAR-2 scores slower by
+    more than `threshold` times (and `min_time` seconds, to ignore the noise of the short runs). Only the runs of the
+    (file, configuration) pairs of both benchmarks are compared, the scores are summed over these runs."""
+    regressions, matched = [], []
+    before = {(record["file"], label(Config(**record["config"]))): record for record in baseline["runs"]}
+    for record in result["runs"]:
+        name = f"{record['file']} {label(Config(**record['config']))}"
+        old = before.get((record["file"], label(Config(**record["config"]))))
+        if old is None:
+            continue
+        matched.append((record, old))
+        if {old["status"], record["status"]} == set(SOLVED) or record["status"] == "WRONG":
+            regressions.append(f"{name}: WRONG ANSWER {record['status']}, was {old['status']}")
+        elif old["status"] in SOLVED and record["status"] not in SOLVED:
+            regressions.append(f"{name}: {record['status']}, was {old['status']} in {old['time']:.3f}s")
+        elif record["status"] in SOLVED and record["time"] > max(threshold * old["time"], old["time"] + min_time):
+            regressions.append(f"{name}: {record['time']:.3f}s, was {old['time']:.3f}s")
+    summary = summarize([record for record, _ in matched], result["timeout"])
+    baseline_summary = summarize([old for _, old in matched], baseline["timeout"])
+    for name, entry in summary.items():
+        old = baseline_summary[name]
+        if entry["solved"] < old["solved"]:
+            regressions.append(f"{name}: {entry['solved']} solved, was {old['solved']}")
+        if entry["par2"] > max(threshold * old["par2"], old["par2"] + min_time):
+            regressions.append(f"{name}: PAR-2 {entry['par2']:.3f}, was {old['par2']:.3f}")
+    return regressions
+
+
+def write_csv(path, records):
+    with open(path, 'w', newline="") as r:
+        csv_writer = csv.writer(r)
+        csv_writer.writerow(CSV_HEADER)
+        for record in records:
+            config = record["config"]
+            csv_writer.writerow([record["file"], config["preprocess"], config["restart"], config["bandit"],
+                                 config["heuristic"], record["status"], record["time"],
+                                 record.get("preprocess_time", ""), record.get("decisions", ""),
+                                 record.get("propagations", ""), record.get("conflicts", ""),
+                                 record.get("restarts", ""), record.get("learned", ""),
+                                 record.get("peak_memory_mb", "")])
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="benchmark the configurations of the solver")
+    parser.add_argument("paths", nargs="*", default=["examples"],
+                        help="CNF files or directories of CNF files, default examples")
+    parser.add_argument("-j", "--jobs", type=int, metavar="J", default=None,
+                        help="number of runs at a time, default one per core")
+    parser.add_argument("--timeout", type=float, metavar="SEC", default=200,
+                        help="wall-clock limit of a run, default 200")
+    parser.add_argument("--memory", type=int, metavar="MB", default=4096,
+                        help="address space limit of a run (not on Windows), 0 for none, default 4096")
+    parser.add_argument("--json", type=str, metavar="FILE", default="results/benchmark.json",
+                        help="JSON results, usable as a later baseline, default results/benchmark.json")
+    parser.add_argument("--csv", type=str, metavar="FILE", default="results/timeTestResult.csv",
+                        help="CSV results, default results/timeTestResult.csv")
+    parser.add_argument("--profile", action="store_true",
+                        help="time the phases of the solver in every run, in the JSON results")
+    parser.add_argument("--baseline", type=str, metavar="FILE", default=None,
+                        help="JSON results of an earlier benchmark, the regressions are listed and make the exit "
+                             "status 1")
+    parser.add_argument("--threshold", type=float, metavar="T", default=1.25,
+                        help="a run or PAR-2 score slower than T times the baseline is a regression, default 1.25")
+    return parser.parse_args()
+
+
+def testTime(args):
+    files, configs = find_instances(args.paths), configurations()
+    records = benchmark(files, configs, args.jobs, args.timeout, args.memory, args.profile)
+    result = {"timeout": args.timeout, "memory_mb": args.memory, "runs": records,
+              "summary": summarize(records, args.timeout)}
+    for path in (args.json, args.csv):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(args.json, "w") as f:
+        json.dump(result, f, indent=1)
+    write_csv(args.csv, records)
 
-    Res = [testfile, preprocess_policy, restart_policy, bandit, assignment_algorithm, hasSolution, solve_time, preprocess_time]
-    return Res
+    width = max(map(len, result["summary"]))
+    print(f"{'configuration':<{width}}  solved  PAR-2")
+    for name, entry in result["summary"].items():
+        print(f"{name:<{width}}  {entry['solved']:>3}/{entry['runs']:<3}  {entry['par2']:.3f}")
+    if args.baseline is None:
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get("timeout") != args.timeout:
+        print(f"warning: the baseline timeout is {baseline.get('timeout')}, PAR-2 scores are not comparable")
+    regressions = compare(result, baseline, args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    print(f"{len(regressions)} regressions with respect to {args.baseline}")
+    return 1 if regressions else 0
 
 
 if __name__ == "__main__":
-    testTime()
+    sys.exit(testTime(parse_args()))
@@ -1,5 +1,7 @@
 import argparse
 
+from tools.cache import DEFAULT_CACHE_DIR, DEFAULT_CACHE_SIZE
+
 # Path: tools\args.py
 
 
@@ -20,7 +22,9 @@ def parse_args():
                         # "LRB"
                         # "CHB"
                         )
-    parser.add_argument("-i", "--input", type=str, help="specify the CNF file needed to be solved, default and1.cnf",
+    parser.add_argument("-i", "--input", type=str,
+                        help="specify the CNF file needed to be solved, may be compressed by gzip, xz or bzip2, "
+                             "default and1.cnf",
                         default=
                         # "examples/and1.cnf"
                         # "examples/and2.cnf"
@@ -35,22 +39,94 @@ def parse_args():
                         # "my-examples/track-main-2018/3c92dedae9bea8c2c22acd655e33d52d-e_rphp065_05.cnf"
                         # "my-examples/track-main-2018/0b8d274c5bf66683cbdd1238771b31f5-queen8-8-9.cnf"
                         )
-    parser.add_argument("-r", "--restart-policy", type=str, choices=["MLR"],
+    parser.add_argument("-r", "--restart-policy", type=str, choices=["MLR", "None"],
                         help="specify the restart policy, default to be None, default None", default=
                         # None
                         "MLR"
                         )
-    parser.add_argument("-p", "--preprocess-policy", type=str, choices=["NiVER", "lighter-NiVER", "li-NiVER-withPLE"],
-                        help="specify the preprocess policy, default to be None, default None", default=
+    parser.add_argument("--reuse-trail", action="store_true",
+                        help="partial restart, keep the decision levels that would be decided again after a restart")
+    parser.add_argument("--phase", type=str, choices=["save", "target", "best"],
+                        help="polarity of decisions: the last value of the variable (save), or the values of the largest "
+                             "conflict-free trail since the last restart (target) or ever (best), default save", default=
+                        "save"
+                        # "target"
+                        # "best"
+                        )
+    parser.add_argument("-p", "--preprocess-policy", type=str,
+                        choices=["NiVER", "lighter-NiVER", "li-NiVER-withPLE", "BVE", "subsume", "subsume+NiVER",
+                                 "subsume+lighter-NiVER", "subsume+BVE", "None"],
+                        help="specify the preprocess policy, subsume+<policy> removes subsumed clauses and strengthens "
+                             "clauses before running <policy>, default None", default=
                         # None
                         # "NiVER"
                         "lighter-NiVER"
                         # "li-NiVER-withPLE"
+                        # "BVE"
+                        # "subsume+lighter-NiVER"
+                        )
+    parser.add_argument("--probe", action="store_true",
+                        help="before the search, substitute equivalent literals and find failed literals by probing")
+    parser.add_argument("-d", "--reduce-policy", type=str, choices=["LBD", "None"],
+                        help="specify the learned clause database reduction policy, default LBD", default=
+                        # None
+                        "LBD"
                         )
-    parser.add_argument("-b", "--bandit", type=str, choices=["UCB"],
+    parser.add_argument("--reduce-schedule", type=int, nargs=2, metavar=("FIRST", "INC"), default=[2000, 300],
+                        help="reduce the learned clause database after FIRST conflicts, then increase the interval "
+                             "between reductions by INC each time, default 2000 300")
+    parser.add_argument("--keep-tiers", type=int, nargs=2, metavar=("CORE", "TIER2"), default=[2, 6],
+                        help="learned clauses with LBD <= CORE are kept forever, those with LBD <= TIER2 are kept "
+                             "while they are used, default 2 6")
+    parser.add_argument("--conflicts", type=int, metavar="N", default=None,
+                        help="give up (UNKNOWN) after N conflicts, default no limit")
+    parser.add_argument("--propagations", type=int, metavar="N", default=None,
+                        help="give up (UNKNOWN) after N propagated literals, default no limit")
+    parser.add_argument("--time-limit", type=float, metavar="SEC", default=None,
+                        help="give up (UNKNOWN) after SEC seconds of search, Ctrl-C gives up as well, default no limit")
+    parser.add_argument("--memory-limit", type=float, metavar="MB", default=None,
+                        help="give up (UNKNOWN) when the resident memory exceeds MB megabytes, default no limit")
+    parser.add_argument("--proof", type=str, metavar="FILE", default=None,
+                        help="write a DRAT proof of unsatisfiability to FILE, compressed if it ends with .gz, .xz or "
+                             ".bz2")
+    parser.add_argument("--text-proof", action="store_true",
+                        help="write the DRAT proof in the text format instead of the binary one")
+    parser.add_argument("--progress", type=float, metavar="SEC", default=0,
+                        help="print the statistics of the search every SEC seconds, default 0 (only at the end)")
+    parser.add_argument("--profile", type=str, metavar="FILE", nargs="?", const="", default=None,
+                        help="time the phases of the search and the hooks of the heuristics, print the breakdown at "
+                             "the end and export it as JSON to FILE if given")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="neither read nor write the cache of parsed and preprocessed formulas")
+    parser.add_argument("--clear-cache", action="store_true",
+                        help="remove all entries of the formula cache before solving")
+    parser.add_argument("--cache-dir", type=str, metavar="DIR", default=DEFAULT_CACHE_DIR,
+                        help=f"directory of the formula cache, default {DEFAULT_CACHE_DIR}")
+    parser.add_argument("--cache-size", type=int, metavar="MB", default=DEFAULT_CACHE_SIZE >> 20,
+                        help="evict the least recently used formulas when the cache exceeds MB megabytes, "
+                             f"default {DEFAULT_CACHE_SIZE >> 20}")
+    parser.add_argument("-b", "--bandit", type=str, choices=["UCB", "None"],
                         help="specify the heuristic changing policy", default=
                         None
                         # "UCB"
                         )
+    parser.add_argument("--bandit-reward", type=str, choices=["decisions", "propagations", "conflicts"],
+                        default="decisions",
+                        help="reward of a heuristic for a run of the bandit: log2(decisions) per decision level "
+                             "reached, propagations per second or conflicts per restart, default decisions")
+    parser.add_argument("--portfolio", type=int, metavar="N", default=0,
+                        help="run the first N configurations of the built-in portfolio in parallel processes, the first "
+                             "answer wins; the options of a single configuration are ignored, default 0 (off)")
+    parser.add_argument("--cube", type=int, metavar="DEPTH", default=0,
+                        help="cube-and-conquer: split the sentence by lookahead into cubes of at most DEPTH literals, "
+                             "solved as assumptions in parallel processes, default 0 (off)")
+    parser.add_argument("--max-cubes", type=int, metavar="N", default=256,
+                        help="stop splitting the sentence when it would give more than N cubes, default 256")
+    parser.add_argument("-j", "--jobs", type=int, metavar="J", default=None,
+                        help="number of processes of the portfolio or of cube-and-conquer, default one per core")
+    parser.add_argument("--share", action="store_true",
+                        help="the workers of the portfolio exchange short learned clauses through shared memory")
+    parser.add_argument("--timeout", type=float, metavar="SEC", default=None,
+                        help="give up the portfolio or cube-and-conquer after SEC seconds, default no limit")
 
     return parser.parse_args()
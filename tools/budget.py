@@ -0,0 +1,71 @@
+"""
+budget.py
+resource budgets of a solve: conflicts, propagations, wall-clock time, memory and an interrupt flag.
+"""
+import os
+import sys
+from time import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_memory_mb():
+    """Peak resident memory of the process in megabytes, 0 where it is not available."""
+    if resource is None:
+        return 0
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1 << 20) if sys.platform == "darwin" else rss / 1024  # bytes on macOS, kilobytes elsewhere
+
+
+def memory_mb():
+    """Current resident memory of the process in megabytes, which goes down when memory is freed; the peak where
+    /proc is not available."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1 << 20)
+    except (OSError, ValueError, AttributeError):
+        return peak_memory_mb()
+
+
+class Budget:
+    """The budgets of one solve, counted from its start: at most `conflicts` conflicts and `propagations` propagated
+    literals, `seconds` of wall-clock time and a resident memory of `memory` megabytes (None for no limit). The memory
+    is the current one (see memory_mb()), so a solve resumed with the same budget goes on once memory has been freed,
+    e.g. by the reduction of the learned clauses.
+    `interrupt` is any flag with an `is_set()` method, e.g. a `threading.Event` or a `multiprocessing.Event` set by
+    another thread or process. The counters are compared at every check, the clock, the memory and the flag only
+    every `check_every` checks. `reason` names the budget that ran out."""
+
+    def __init__(self, stats, conflicts=None, propagations=None, seconds=None, memory=None, interrupt=None,
+                 check_every=64):
+        inf = float("inf")
+        self.max_conflicts = stats.conflicts + conflicts if conflicts is not None else inf
+        self.max_propagations = stats.propagations + propagations if propagations is not None else inf
+        self.deadline = time() + seconds if seconds is not None else None
+        self.memory = memory
+        self.interrupt = interrupt
+        self.check_every = check_every
+        self.countdown = check_every
+        self.reason = None
+
+    def exhausted(self, stats):
+        """Whether a budget has run out."""
+        if stats.conflicts >= self.max_conflicts:
+            self.reason = "conflicts"
+        elif stats.propagations >= self.max_propagations:
+            self.reason = "propagations"
+        else:
+            self.countdown -= 1
+            if self.countdown:
+                return False
+            self.countdown = self.check_every
+            if self.deadline is not None and time() >= self.deadline:
+                self.reason = "time"
+            elif self.memory is not None and memory_mb() >= self.memory:
+                self.reason = "memory"
+            elif self.interrupt is not None and self.interrupt.is_set():
+                self.reason = "interrupted"
+        return self.reason is not None
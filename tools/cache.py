@@ -0,0 +1,161 @@
+"""
+cache.py
+a content-addressed on-disk cache of parsed and preprocessed formulas, so that neither the parsing nor the
+preprocessing of a file has to be repeated by every run of the solver.
+"""
+import hashlib
+import os
+import struct
+from array import array
+from itertools import accumulate
+from time import time
+
+from preprocess import Preprocessed, preprocess_key
+from tools.utils import open_cnf, read_cnf
+
+DEFAULT_CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+                                 "advanced-sat-solver")
+DEFAULT_CACHE_SIZE = 512 << 20  # bytes
+
+# magic, version, num_vars, refuted, then the lengths of the 6 int32 arrays that follow
+_HEADER = struct.Struct("=4sIiI6Q")
+_MAGIC, _VERSION = b"SATC", 1
+
+
+def _pack(sentence, num_vars, removed_clause):
+    """Serialize a formula and its stack of removed clauses into flat int32 arrays behind a fixed header."""
+    refuted, sentence = sentence is None, sentence or []
+    lengths = array("i", map(len, sentence))
+    literals = array("i", [lit for clause in sentence for lit in clause])
+    removed_vars = array("i", [var for var, _ in removed_clause])
+    removed_counts = array("i", [len(clauses) for _, clauses in removed_clause])
+    removed_lengths = array("i", [len(clause) for _, clauses in removed_clause for clause in clauses])
+    removed_literals = array("i", [lit for _, clauses in removed_clause for clause in clauses for lit in clause])
+    arrays = (lengths, literals, removed_vars, removed_counts, removed_lengths, removed_literals)
+    header = _HEADER.pack(_MAGIC, _VERSION, num_vars, refuted, *map(len, arrays))
+    return header + b"".join(a.tobytes() for a in arrays)
+
+
+def _split(literals, lengths):
+    """Cut a flat list of literals into clauses of the given lengths."""
+    ends = list(accumulate(lengths))
+    return [literals[start:end] for start, end in zip([0] + ends, ends)]
+
+
+def _unpack(data):
+    """Inverse of _pack(...), return `(sentence, num_vars, removed_clause)`."""
+    magic, version, num_vars, refuted, *sizes = _HEADER.unpack_from(data)
+    if magic != _MAGIC or version != _VERSION:
+        raise ValueError("not a formula cache entry of this version")
+    view, offset, arrays = memoryview(data), _HEADER.size, []
+    for size in sizes:
+        a = array("i")
+        a.frombytes(view[offset:offset + 4 * size])
+        arrays.append(a)
+        offset += 4 * size
+    lengths, literals, removed_vars, removed_counts, removed_lengths, removed_literals = arrays
+    sentence = None if refuted else _split(literals.tolist(), lengths)
+    removed = _split(_split(removed_literals.tolist(), removed_lengths), removed_counts)
+    return sentence, num_vars, list(zip(removed_vars.tolist(), removed))
+
+
+class FormulaCache:
+    """Cache of formulas keyed by the SHA-256 of the input file and the preprocess policy, with the version of the
+    preprocessing code and the parameters of the policy (`preprocess.preprocess_key`), so that a change of either is
+    never served a stale result.
+    Every entry is a file in `directory`; when their total size exceeds `max_size` bytes, the least recently used
+    entries are evicted."""
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_size=DEFAULT_CACHE_SIZE):
+        self.directory = directory
+        self.max_size = max_size
+        self._digests = {}  # (path, size, mtime) -> digest of the file
+        self.hits, self.misses = 0, 0
+
+    def read_cnf(self, path):
+        """Parse a (possibly compressed) DIMACS file like `tools.utils.read_cnf`, through the cache."""
+        entry = self.load(path, None)
+        if entry is not None:
+            return entry.sentence, entry.num_vars
+        with open_cnf(path) as f:
+            sentence, num_vars = read_cnf(f)
+        self.store(path, None, sentence, num_vars)
+        return sentence, num_vars
+
+    def load(self, path, preprocess_policy):
+        """Return the cached result of preprocessing the file as a `Preprocessed` preprocessor, None if not cached."""
+        start_time = time()
+        entry = self._entry(path, preprocess_policy)
+        try:
+            with open(entry, "rb") as f:
+                sentence, num_vars, removed_clause = _unpack(f.read())
+            os.utime(entry)  # mark as recently used
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, ValueError, struct.error):  # unreadable or corrupted entry
+            self._remove(entry)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return Preprocessed(sentence, num_vars, removed_clause, time() - start_time)
+
+    def store(self, path, preprocess_policy, sentence, num_vars, removed_clause=()):
+        """Cache the (preprocessed) sentence of the file, None if preprocessing refuted it, with its stack of removed
+        clauses. Must be called before solving, which adds learned clauses to the sentence."""
+        os.makedirs(self.directory, exist_ok=True)
+        entry = self._entry(path, preprocess_policy)
+        tmp = f"{entry}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(_pack(sentence, num_vars, removed_clause))
+        os.replace(tmp, entry)  # atomic, concurrent readers never see a partial entry
+        self._evict()
+
+    def clear(self):
+        """Remove all entries."""
+        for entry in self._entries():
+            self._remove(entry)
+
+    def _entry(self, path, preprocess_policy):
+        policy = "none" if preprocess_policy is None else preprocess_policy.lower()
+        key = hashlib.sha256(preprocess_key(preprocess_policy).encode()).hexdigest()[:16]
+        return os.path.join(self.directory, f"{self._digest(path)}-{policy}-{key}.bin")
+
+    def _digest(self, path):
+        stat = os.stat(path)
+        key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        if key not in self._digests:
+            sha = hashlib.sha256()
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    sha.update(block)
+            self._digests[key] = sha.hexdigest()
+        return self._digests[key]
+
+    def _entries(self):
+        if not os.path.isdir(self.directory):
+            return []
+        return [os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith(".bin")]
+
+    def _evict(self):
+        """Remove the least recently used entries until the cache fits in `max_size`."""
+        entries = []
+        for entry in self._entries():
+            try:
+                stat = os.stat(entry)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry))
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries):
+            if total <= self.max_size:
+                break
+            self._remove(entry)
+            total -= size
+
+    @staticmethod
+    def _remove(entry):
+        try:
+            os.remove(entry)
+        except OSError:
+            pass
@@ -0,0 +1,91 @@
+"""
+check-incremental.py
+check the incremental interface of the solver (add_clause(...) and solve(...) with assumptions) against brute force
+on random small formulas: every answer must agree with an exhaustive search, and every model must satisfy the
+assumptions and all the clauses added so far, tautologies included.
+usage: python tools/check-incremental.py [RUNS] [FIRST_SEED]
+"""
+import itertools
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from CDCL import CDCL  # noqa: E402
+
+
+def satisfiable(clauses, num_vars, assumptions=()):
+    """Whether an assignment of the variables 1..num_vars satisfies the assumptions and the clauses."""
+    for signs in itertools.product((1, -1), repeat=num_vars):
+        model = {var * sign for var, sign in zip(range(1, num_vars + 1), signs)}
+        if all(lit in model for lit in assumptions) and all(any(lit in model for lit in clause) for clause in clauses):
+            return True
+    return False
+
+
+def random_clause(rnd, num_vars, variables, max_size=3):
+    return [rnd.choice((1, -1)) * rnd.choice(variables) for _ in range(rnd.randint(1, max_size))] if num_vars else []
+
+
+def check(seed, steps=5):
+    """Run one random sequence of added clauses and solves, return None if it is right, else a description."""
+    rnd = random.Random(seed)
+    num_vars = rnd.randint(2, 7)
+    variables = list(range(1, num_vars + 1))
+    clauses = [random_clause(rnd, num_vars, variables) for _ in range(rnd.randint(1, 12))]
+    for _ in range(rnd.randint(0, 2)):  # equivalent literals, substituted by probing
+        a, b = rnd.sample(variables, 2)
+        sign = rnd.choice((1, -1))
+        clauses += [[a, -sign * b], [-a, sign * b]]
+    frozen = rnd.sample(variables, rnd.randint(0, num_vars))  # the old variables that later clauses may use
+    probe = rnd.random() < 0.5
+    cdcl = CDCL([list(clause) for clause in clauses], num_vars, rnd.choice(["VSIDS", "LRB", "CHB", "ERWA", "RSR"]),
+                0.4, 0.95, 10, "MLR", rnd.choice([None, "UCB"]), None, "LBD",
+                reduce_schedule=rnd.choice([(2000, 300), (1, 0)]), probe=probe, frozen=frozen)
+    usable = list(frozen)  # variables of the later clauses and assumptions: frozen or new
+    for step in range(steps):
+        for _ in range(rnd.randint(0, 3)):
+            if rnd.random() < 0.3:  # a new variable
+                num_vars += 1
+                usable.append(num_vars)
+            if not usable:
+                continue
+            clause = random_clause(rnd, num_vars, usable)
+            if rnd.random() < 0.1:  # a tautology, whose variables take part in the models all the same
+                clause.append(-clause[0])
+            added = [clause]
+            if len(usable) > 1 and rnd.random() < 0.2:  # equivalent literals, possibly new ones
+                a, b = rnd.sample(usable, 2)
+                added = [[a, -b], [-a, b]]
+            for clause in added:
+                cdcl.add_clause(clause)
+                clauses.append(clause)
+        assumptions = [rnd.choice((1, -1)) * rnd.choice(usable) for _ in range(rnd.randint(0, 2))] if usable else []
+        solution = cdcl.solve(assumptions)[0]
+        expected = satisfiable(clauses, num_vars, assumptions)
+        if (solution is not None) != expected:
+            return f"step {step}: {'SAT' if expected else 'UNSAT'} expected"
+        if solution is not None:
+            model = set(solution)
+            if not all(lit in model for lit in assumptions):
+                return f"step {step}: an assumption is false in the model"
+            if not all(any(lit in model for lit in clause) for clause in clauses):
+                return f"step {step}: a clause is false in the model"
+    return None
+
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    first = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    failures = 0
+    for seed in range(first, first + runs):
+        try:
+            error = check(seed)
+        except Exception as e:
+            error = repr(e)
+        if error is not None:
+            failures += 1
+            print(f"seed {seed}: {error}")
+    print(f"{failures} failures in {runs} runs")
+    sys.exit(1 if failures else 0)
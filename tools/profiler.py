@@ -0,0 +1,112 @@
+"""
+profiler.py
+opt-in profiling of the solver: the phases of the search and the hooks of the heuristics and the restart policy are
+timed with perf_counter_ns. Nothing is timed, so nothing costs, unless a profiler is attached to the solver.
+"""
+import json
+from time import perf_counter_ns
+
+# method of CDCL -> phase
+PHASES = {
+    "solve": "solve (setup and reconstruction)",
+    "_calculate": "search loop",
+    "_bcp": "bcp",
+    "_analyze_conflict": "conflict analysis",
+    "_after_conflict_analysis": "learning",
+    "_backtrack": "backtrack",
+    "_restart": "restart",
+    "_reduce_db": "reduce db",
+    "_probe": "probe",
+    "_import_clauses": "import clauses",
+    "_add_pending_clauses": "add clauses",
+}
+HEURISTIC_HOOKS = ("decide", "after_bcp", "after_conflict_analysis", "on_assign", "on_unassign", "update_weights",
+                   "on_restart")
+RESTART_HOOKS = ("after_conflict", "after_bcp")
+BANDIT_HOOKS = ("change_heuristic",)
+
+
+class Profiler:
+    """Call counts and exclusive times of the phases of a solver: the time of a phase does not include the phases and
+    hooks it calls, so the times add up to the total. attach(...) replaces the methods of the solver and of its
+    heuristics, restart policy and bandit by timed ones, on these objects only; the timing itself slows the hottest
+    hooks (e.g. on_assign) down, so compare the phases of profiled runs with each other."""
+
+    def __init__(self):
+        self.phases = {}  # name -> [calls, nanoseconds]
+        self._stack = []  # [phase entry, start of its current slice] of the running phases
+
+    def attach(self, cdcl):
+        """Time the phases of the solver from now on."""
+        for method, name in PHASES.items():
+            self._wrap(cdcl, method, name)
+        if cdcl.sentence is None:  # refuted by preprocessing, there is no search
+            return
+        heuristics = cdcl.bandit.Heuristics if cdcl.bandit is not None else [cdcl.heuristic]
+        for heuristic in heuristics:
+            if heuristic is not None:
+                self._wrap_heuristic(heuristic)
+        for policy, hooks in ((cdcl.rp, RESTART_HOOKS), (cdcl.bandit, BANDIT_HOOKS)):
+            if policy is not None:
+                for hook in hooks:
+                    self._wrap(policy, hook, f"{type(policy).__name__}.{hook}")
+        if cdcl.bandit is not None:  # the arms the bandit builds later are timed as well
+            build = cdcl.bandit.build
+
+            def build_timed(arm):
+                heuristic = build(arm)
+                self._wrap_heuristic(heuristic)
+                return heuristic
+
+            cdcl.bandit.build = build_timed
+
+    def _wrap_heuristic(self, heuristic):
+        for hook in HEURISTIC_HOOKS:
+            self._wrap(heuristic, hook, f"{type(heuristic).__name__}.{hook}")
+
+    def _wrap(self, obj, method, name):
+        function = getattr(obj, method)
+        entry = self.phases.setdefault(name, [0, 0])
+        stack = self._stack
+
+        def timed(*args, **kwargs):
+            now = perf_counter_ns()
+            if stack:  # pause the caller
+                caller = stack[-1]
+                caller[0][1] += now - caller[1]
+            frame = [entry, now]
+            stack.append(frame)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                now = perf_counter_ns()
+                entry[0] += 1
+                entry[1] += now - frame[1]
+                stack.pop()
+                if stack:  # resume the caller
+                    stack[-1][1] = now
+
+        setattr(obj, method, timed)
+
+    def total_ns(self):
+        return sum(ns for _, ns in self.phases.values())
+
+    def as_dict(self):
+        """The phases that were called, the most expensive first."""
+        phases = sorted(((name, calls, ns) for name, (calls, ns) in self.phases.items() if calls),
+                        key=lambda phase: -phase[2])
+        return {"total_ns": self.total_ns(), "phases": {name: {"calls": calls, "ns": ns} for name, calls, ns in phases}}
+
+    def dump(self, path):
+        """Export the breakdown as JSON."""
+        with open(path, "w") as f:
+            json.dump(self.as_dict(), f, indent=1)
+
+    def __str__(self):
+        total = self.total_ns() or 1
+        lines = [f"c {'phase':<40} {'calls':>10} {'seconds':>10} {'%':>6} {'us/call':>9}"]
+        for name, phase in self.as_dict()["phases"].items():
+            calls, ns = phase["calls"], phase["ns"]
+            lines.append(f"c {name:<40} {calls:>10} {ns / 1e9:>10.3f} {100 * ns / total:>6.1f} "
+                         f"{ns / calls / 1e3:>9.2f}")
+        return "\n".join(lines)
@@ -0,0 +1,73 @@
+"""
+proof.py
+DRAT proofs of unsatisfiability, to be checked by e.g. drat-trim against the input sentence.
+"""
+import bz2
+import gzip
+import lzma
+
+_OPENERS = {".gz": gzip.open, ".xz": lzma.open, ".bz2": bz2.open}
+
+
+class DratProof:
+    """A DRAT proof written to `path`, compressed by gzip, xz or bzip2 according to its extension.
+    Every added clause (lemma) must follow from the clauses so far by reverse unit propagation (or be a RAT), and
+    deleted clauses are dropped from them; a refutation ends with the empty clause. The binary format encodes a step as
+    'a' or 'd', then every literal l as the variable-length integer 2 * |l| + (l < 0), then 0. Steps are collected in a
+    buffer which is written out once it exceeds `buffer_size` bytes."""
+
+    def __init__(self, path, binary=True, buffer_size=1 << 20):
+        opener = next((opener for extension, opener in _OPENERS.items() if path.endswith(extension)), open)
+        self.file = opener(path, "wb")
+        self.binary = binary
+        self.buffer_size = buffer_size
+        self.buffer = bytearray()
+        self.codes = {}  # literal -> its encoding in the binary format
+        self.num_added, self.num_deleted = 0, 0
+
+    def add(self, clause):
+        self.num_added += 1
+        self._write(b"a", b"", clause)
+
+    def delete(self, clause):
+        self.num_deleted += 1
+        self._write(b"d", b"d ", clause)
+
+    def _write(self, binary_tag, text_tag, clause):
+        buffer = self.buffer
+        if self.binary:
+            codes = self.codes
+            buffer += binary_tag
+            buffer += b"".join([codes.get(lit) or self._encode(lit) for lit in clause])
+            buffer.append(0)
+        else:
+            buffer += text_tag
+            buffer += " ".join(map(str, clause)).encode()
+            buffer += b" 0\n" if clause else b"0\n"
+        if len(buffer) >= self.buffer_size:
+            self.flush()
+
+    def _encode(self, lit):
+        """The variable-length bytes of a literal, 7 bits at a time from the lowest ones, cached."""
+        code, encoded = 2 * lit if lit > 0 else -2 * lit + 1, bytearray()
+        while code > 127:
+            encoded.append(code & 127 | 128)
+            code >>= 7
+        encoded.append(code)
+        self.codes[lit] = bytes(encoded)
+        return self.codes[lit]
+
+    def flush(self):
+        self.file.write(self.buffer)
+        self.buffer.clear()
+        self.file.flush()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,120 @@
+"""
+sharing.py
+exchange of short learned clauses between solver processes through a ring buffer in shared memory.
+"""
+from multiprocessing import Lock
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+DEFAULT_CAPACITY = 1 << 20  # int32 words
+
+
+class ClauseRing:
+    """Ring buffer of int32 words in shared memory, written by all workers and read by each one at its own position.
+    Positions count the words written since the creation, the word of position p is at p % capacity.
+    Writers are serialized by a lock: a writer first reserves its words, then writes them, then publishes them by
+    moving the write position. Readers take no lock: they copy the published words, and drop the copy if a writer
+    may have overwritten it meanwhile, which they check against the reserved position."""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.shm = SharedMemory(create=True, size=16 + 4 * capacity)
+        self.lock = Lock()
+        self._attach()
+
+    def _attach(self):
+        self.header = np.ndarray((2,), dtype=np.int64, buffer=self.shm.buf)  # write position, reserved position
+        self.words = np.ndarray((self.capacity,), dtype=np.int32, buffer=self.shm.buf, offset=16)
+
+    def __getstate__(self):  # numpy views are rebuilt on the shared memory in the other process
+        return self.capacity, self.shm, self.lock
+
+    def __setstate__(self, state):
+        self.capacity, self.shm, self.lock = state
+        self._attach()
+
+    def write(self, words):
+        """Append words to the ring."""
+        n, capacity = len(words), self.capacity
+        with self.lock:
+            position = int(self.header[0])
+            self.header[1] = position + n
+            start = position % capacity
+            first = min(n, capacity - start)
+            self.words[start:start + first] = words[:first]
+            self.words[:n - first] = words[first:]
+            self.header[0] = position + n
+
+    def read(self, position):
+        """Return the words published since position and the new position. Words lost because the reader fell
+        behind by more than the capacity are skipped."""
+        capacity = self.capacity
+        end = int(self.header[0])
+        if end - position > capacity:
+            return [], end
+        start, stop = position % capacity, end % capacity
+        if start <= stop and end - position < capacity:
+            words = self.words[start:stop].tolist()
+        else:
+            words = self.words[start:].tolist() + self.words[:stop].tolist()
+        if int(self.header[1]) - position > capacity:  # overwritten while copying
+            return [], end
+        return words, end
+
+    def close(self):
+        """Detach from the shared memory."""
+        del self.header, self.words
+        self.shm.close()
+
+    def unlink(self):
+        """Free the shared memory, once all the workers are done with it."""
+        self.shm.unlink()
+
+
+class ClauseExchange:
+    """The view of one worker on a `ClauseRing`.
+    Learned clauses of at most `max_size` literals and LBD at most `max_lbd`, and all learned units, are exported as
+    records `(worker, lbd, size, literals...)`. Clauses already exported or imported by this worker are skipped, and at
+    most `import_limit` clauses are imported at a time, the rest of them are dropped."""
+
+    def __init__(self, ring, worker, max_size=8, max_lbd=4, import_limit=200):
+        self.ring = ring
+        self.worker = worker
+        self.max_size = max_size
+        self.max_lbd = max_lbd
+        self.import_limit = import_limit
+        self.position = int(ring.header[0])
+        self.known = set()  # sorted tuples of the clauses exported or imported
+        self.num_exported, self.num_imported, self.num_useful, self.num_dropped = 0, 0, 0, 0
+
+    def export(self, clause, lbd):
+        """Offer a learned clause to the other workers."""
+        if len(clause) > 1 and (len(clause) > self.max_size or lbd > self.max_lbd):
+            return
+        key = tuple(sorted(clause))
+        if key in self.known:
+            return
+        self.known.add(key)
+        self.ring.write([self.worker, lbd, len(clause)] + list(clause))
+        self.num_exported += 1
+
+    def receive(self):
+        """The new clauses of the other workers, as `(clause, lbd)` pairs."""
+        words, self.position = self.ring.read(self.position)
+        clauses, i = [], 0
+        while i + 3 <= len(words):
+            worker, lbd, size = words[i:i + 3]
+            clause = words[i + 3:i + 3 + size]
+            i += 3 + size
+            if worker == self.worker:
+                continue
+            key = tuple(sorted(clause))
+            if key in self.known:
+                continue
+            if len(clauses) >= self.import_limit:
+                self.num_dropped += 1
+                continue
+            self.known.add(key)
+            clauses.append((clause, lbd))
+        return clauses
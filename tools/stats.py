@@ -0,0 +1,88 @@
+"""
+stats.py
+counters of the search, cheap enough to be always on, with rates per second and progress lines in the DIMACS comment
+format ("c ...").
+"""
+import sys
+from collections import Counter
+from time import time
+
+
+class SolverStats:
+    """Counters of a solver over all its solves: decisions of the heuristic, propagated literals, conflicts,
+    restarts, learned clauses (with their total length and a histogram of their LBD), deleted learned clauses and the
+    peak size of the trail. With an `interval` other than 0, a progress line is printed to `file` (stdout by default)
+    every `interval` seconds of search, which is checked every 64 conflicts."""
+
+    def __init__(self, interval=0, file=None):
+        self.decisions, self.propagations, self.conflicts, self.restarts = 0, 0, 0, 0
+        self.learned, self.learned_literals, self.deleted, self.peak_trail = 0, 0, 0, 0
+        self.lbd_histogram = Counter()
+        self.interval = interval
+        self.file = file
+        self.search_time = 0.0  # seconds of the finished solves
+        self._start, self._next_report = None, 0
+
+    def start(self):
+        self._start = time()
+        self._next_report = self._start + self.interval
+
+    def stop(self):
+        if self._start is not None:
+            self.search_time += time() - self._start
+            self._start = None
+
+    @property
+    def seconds(self):
+        """Seconds of search so far, the current solve included."""
+        return self.search_time + (time() - self._start if self._start is not None else 0)
+
+    def after_bcp(self, propagated, trail_size):
+        self.propagations += propagated
+        if trail_size > self.peak_trail:
+            self.peak_trail = trail_size
+
+    def after_learn(self, clause, lbd):
+        self.conflicts += 1
+        self.learned += 1
+        self.learned_literals += len(clause)
+        self.lbd_histogram[lbd] += 1
+        if self.interval and not self.conflicts & 63 and time() >= self._next_report:
+            self._next_report += self.interval
+            self.report()
+
+    def rates(self):
+        """Decisions, propagations and conflicts per second of search."""
+        seconds = self.seconds or 1e-9
+        return {"decisions": self.decisions / seconds, "propagations": self.propagations / seconds,
+                "conflicts": self.conflicts / seconds}
+
+    def as_dict(self):
+        return {"seconds": self.seconds, "decisions": self.decisions, "propagations": self.propagations,
+                "conflicts": self.conflicts, "restarts": self.restarts, "learned": self.learned,
+                "average_learned_length": self.learned_literals / self.learned if self.learned else 0,
+                "lbd_histogram": dict(sorted(self.lbd_histogram.items())), "deleted": self.deleted,
+                "peak_trail": self.peak_trail, "rates": self.rates()}
+
+    def report(self):
+        """Print a progress line."""
+        rates = self.rates()
+        print(f"c {self.seconds:9.2f}s {self.conflicts:>10} conflicts ({rates['conflicts']:.0f}/s) "
+              f"{self.decisions:>10} decisions {self.propagations:>12} propagations ({rates['propagations']:.0f}/s) "
+              f"{self.restarts:>6} restarts {self.learned - self.deleted:>8} learned clauses alive",
+              file=self.file or sys.stdout, flush=True)
+
+    def __str__(self):
+        rates = self.rates()
+        average = self.learned_literals / self.learned if self.learned else 0
+        histogram = " ".join(f"{lbd}:{count}" for lbd, count in sorted(self.lbd_histogram.items()))
+        return "\n".join([
+            f"c search time      {self.seconds:.3f} s",
+            f"c decisions        {self.decisions} ({rates['decisions']:.0f}/s)",
+            f"c propagations     {self.propagations} ({rates['propagations']:.0f}/s)",
+            f"c conflicts        {self.conflicts} ({rates['conflicts']:.0f}/s)",
+            f"c restarts         {self.restarts}",
+            f"c learned clauses  {self.learned}, {average:.1f} literals on average, {self.deleted} deleted",
+            f"c LBD histogram    {histogram}",
+            f"c peak trail       {self.peak_trail}",
+        ])
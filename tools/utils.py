@@ -1,17 +1,173 @@
+import bz2
+import gzip
+import lzma
+import re
+from array import array
+from itertools import accumulate, chain
+
+import numpy as np
+
+CNF_EXTENSIONS = (".cnf", ".cnf.gz", ".cnf.xz", ".cnf.bz2")
+_BLOCK_SIZE = 1 << 22  # bytes parsed at a time
+_MARKERS = {bytes: (b"c", b"p", b"%"), str: ("c", "p", "%")}
+_SPECIAL_LINE = {bytes: re.compile(rb"^[ \t]*[cp%][^\n]*", re.M), str: re.compile(r"^[ \t]*[cp%][^\n]*", re.M)}
+
+
+def open_cnf(path):
+    """Open a DIMACS file for binary reading, files compressed by gzip, xz or bzip2 are decompressed transparently."""
+    with open(path, "rb") as f:
+        magic = f.read(6)
+    if magic.startswith(b"\x1f\x8b"):
+        return gzip.open(path, "rb")
+    if magic.startswith(b"\xfd7zXZ\x00"):
+        return lzma.open(path, "rb")
+    if magic.startswith(b"BZh"):
+        return bz2.open(path, "rb")
+    return open(path, "rb")
+
+
+def _read_blocks(fp, header):
+    """Read a DIMACS file in large blocks cut at line ends, and yield the list of integers of each block.
+    Comment lines are skipped, the problem line is parsed into `header` = [num_vars, num_clauses], and a line
+    starting with `%` ends the file (as in the SATLIB benchmarks). `fp` may be opened in binary or text mode."""
+    rest = None
+    while True:
+        block = fp.read(_BLOCK_SIZE)
+        if rest is None:
+            rest = block[:0]
+        newline = "\n" if isinstance(block, str) else b"\n"
+        end = not block
+        if end:
+            block, rest = rest, rest[:0]
+        else:
+            cut = block.rfind(newline) + 1
+            if cut == 0:  # no line end in this block yet
+                rest += block
+                continue
+            block, rest = rest + block[:cut], block[cut:]
+        pattern = _SPECIAL_LINE[type(block)]
+        if any(marker in block for marker in _MARKERS[type(block)]) and pattern.search(block):
+            for match in pattern.finditer(block):
+                line = match.group().split()
+                if line[0] in ("p", b"p"):
+                    header[:] = int(line[2]), int(line[3])
+                elif line[0][:1] in ("%", b"%"):
+                    block, end = block[:match.start()], True
+                    break
+            block = pattern.sub(block[:0], block)
+        yield list(map(int, block.split()))
+        if end:
+            return
+
+
+def _check_header(header, max_var):
+    if not header:
+        raise ValueError("DIMACS problem line 'p cnf <variables> <clauses>' is missing")
+    if max_var > header[0]:
+        raise ValueError(f"variable {max_var} exceeds the {header[0]} variables declared in the problem line")
+
+
 def read_cnf(fp):
-    sentence = []
-    for line in fp:
-        if line.startswith('c'):
+    """Parse a DIMACS CNF file into a list of clauses and the number of variables.
+    Clauses may span several lines or share a line, each one ends with 0."""
+    sentence, clause, header, max_var = [], [], [], 0
+    for numbers in _read_blocks(fp, header):
+        if not numbers:
             continue
-        if line.startswith('p'):
-            line = line.split()
-            num_vars, num_clauses = int(line[2]), int(line[3])
-        else:
-            line = line.split()
-            clause = [int(x) for x in line[:-1]]
-            sentence.append(clause)
-    assert len(sentence) == num_clauses
-    return sentence, num_vars
+        max_var = max(max_var, max(numbers), -min(numbers))
+        i, index = 0, numbers.index
+        while True:
+            try:
+                j = index(0, i)
+            except ValueError:  # the last clause goes on in the next block
+                clause.extend(numbers[i:])
+                break
+            if clause:
+                clause.extend(numbers[i:j])
+                sentence.append(clause)
+                clause = []
+            else:
+                sentence.append(numbers[i:j])
+            i = j + 1
+    if clause:  # the last clause is not ended by 0
+        sentence.append(clause)
+    _check_header(header, max_var)
+    return sentence, header[0]
+
+
+def read_cnf_flat(fp):
+    """Parse a DIMACS CNF file into a flat array of all literals without any list per clause.
+    Return `(literals, offsets, num_vars)`, the literals of clause k are `literals[offsets[k]:offsets[k + 1]]`."""
+    literals, offsets, header, max_var = array("i"), array("q", [0]), [], 0
+    for numbers in _read_blocks(fp, header):
+        if not numbers:
+            continue
+        max_var = max(max_var, max(numbers), -min(numbers))
+        base, zeros, i, index = len(literals), 0, 0, numbers.index
+        while True:
+            try:
+                j = index(0, i)
+            except ValueError:
+                break
+            offsets.append(base + j - zeros)
+            zeros += 1
+            i = j + 1
+        literals.extend(filter(None, numbers))
+    if offsets[-1] != len(literals):  # the last clause is not ended by 0
+        offsets.append(len(literals))
+    _check_header(header, max_var)
+    return literals, offsets, header[0]
+
+
+def _truth_table(solution, num_vars):
+    """Boolean array indexed by literal, True for the literals of the solution, negative literals wrap around."""
+    true = np.zeros(2 * num_vars + 1, dtype=bool)
+    true[np.asarray(solution, dtype=np.int64)] = True
+    return true
+
+
+def falsified_clause(literals, offsets, solution):
+    """Index of the first clause of a flat sentence (as returned by read_cnf_flat) falsified by the solution, None if
+    the solution satisfies every clause. The values of all the literals are gathered at once from a boolean array and
+    ORed per clause by reduceat; an empty clause is falsified."""
+    literals = np.frombuffer(literals, dtype=np.int32)
+    offsets = np.frombuffer(offsets, dtype=np.int64)
+    num_vars = max(int(np.abs(literals).max(initial=0)), max(map(abs, solution), default=0))
+    values = np.append(_truth_table(solution, num_vars)[literals], False)  # the sentinel ends the empty clauses last
+    satisfied = np.logical_or.reduceat(values, offsets[:-1]) & (offsets[1:] > offsets[:-1])
+    falsified = np.flatnonzero(~satisfied)
+    return int(falsified[0]) if len(falsified) else None
+
+
+def verify_file(fp, solution):
+    """Check a solution against the DIMACS file `fp` read again block by block, like read_cnf(...), so the sentence
+    does not have to be kept in memory for it. Return the index of the first falsified clause, None if the solution
+    satisfies every clause."""
+    header, true, index = [], None, 0
+    satisfied, pending = False, False  # of the clause going on from the previous block
+    for numbers in _read_blocks(fp, header):
+        if not numbers:
+            continue
+        numbers = np.array(numbers, dtype=np.int64)
+        _check_header(header, int(np.abs(numbers).max()))
+        if true is None:
+            true = _truth_table(solution, header[0])
+        values = true[numbers]  # 0 ends a clause and is never true
+        ends = np.flatnonzero(numbers == 0)
+        if not len(ends):
+            satisfied, pending = satisfied or bool(values.any()), True
+            continue
+        starts = np.concatenate(([0], ends[:-1] + 1))
+        clauses = np.logical_or.reduceat(values[:ends[-1] + 1], starts)  # every clause has at least its 0
+        clauses[0] |= satisfied
+        falsified = np.flatnonzero(~clauses)
+        if len(falsified):
+            return index + int(falsified[0])
+        index += len(ends)
+        satisfied, pending = bool(values[ends[-1] + 1:].any()), len(numbers) > ends[-1] + 1
+    if not header:
+        _check_header(header, 0)
+    return index if pending and not satisfied else None  # the last clause is not ended by 0
 
 
 def verify(sentence, solution):
@@ -21,10 +177,6 @@ def verify(sentence, solution):
     :param solution: list of int, signed literals, -5 means variable_5 is False(or in other word, literal_-5 is True)
     :return: True or False
     """
-    solution = set(solution)
-
-    def clause_is_true(cl):
-        return any([literal in solution for literal in cl])
-
-    return all([clause_is_true(clause) for clause in sentence])
-
+    literals = array("i", chain.from_iterable(sentence))
+    offsets = array("q", accumulate(map(len, sentence), initial=0))
+    return falsified_clause(literals, offsets, solution) is None